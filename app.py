@@ -8,7 +8,6 @@ from dotenv import load_dotenv
 # EXISTING IMPORTS (UNCHANGED)
 # ------------------------------
 from core.db import (
-    init_db,
     fetch_all_receipts,
     fetch_receipt_details,
     fetch_policies,
@@ -16,12 +15,13 @@ from core.db import (
     delete_policy,
     fetch_validation_logs
 )
-from core.policy_loader import load_policies
-from core.agent_graph import finance_graph
+from core.agent_graph import get_finance_graph
+from core.startup import ensure_started
 
 # ------------------------------
 # DISPUTE MODULE
 # ------------------------------
+from dispute.db import DISPUTE_SCHEMA
 from dispute.ui import render_dispute_ui
 
 # -------------------------------------------------
@@ -30,16 +30,9 @@ from dispute.ui import render_dispute_ui
 load_dotenv()
 
 # -------------------------------------------------
-# Init (UNCHANGED)
+# Init (schema + policy seeding, once per process)
 # -------------------------------------------------
-init_db()
-
-with open("load_policy_state.txt", "r") as f:
-    load_policy_state = f.read().strip()
-
-if load_policy_state == "False":
-    load_policies()
-    st.session_state.policies_loaded = True
+ensure_started(DISPUTE_SCHEMA)
 
 st.set_page_config(layout="wide")
 st.title("📄 AI Dispute Analysis System")
@@ -85,7 +78,7 @@ tab_dispute_analysis = st.tabs(
 #                 file_path = tmp.name
 
 #             if st.button("Run End-to-End Validation"):
-#                 result = finance_graph.invoke({
+#                 result = get_finance_graph().invoke({
 #                     "file_path": file_path,
 #                     "llm_provider": llm_provider
 #                 })
@@ -0,0 +1,117 @@
+"""
+validate_receipt per receipt vs validate_receipts_batch, with an
+output parity check (results, validation_logs and ledger rollups).
+
+    python -m benchmarks.bench_batch_validation [receipts]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import core.db as core_db
+from core.batch_validation import validate_receipts_batch
+from core.policy_loader import load_policies
+from core.sqlite_pool import close_thread_connections
+from core.validation_agent import validate_receipt
+
+DESCRIPTIONS = [
+    "Veg thali lunch", "Paneer tikka", "Mineral water", "Room charges",
+    "Uber cab ride", "AWS EC2 usage", "SaaS subscription", "Laundry",
+    "Driver allowance", "CGST", "SGST", "Conference pass", "Beer", None
+]
+
+
+def _receipts(n, seed=5):
+    rng = random.Random(seed)
+    receipts = []
+    for receipt_id in range(1, n + 1):
+        line_items = [
+            {
+                "description": rng.choice(DESCRIPTIONS),
+                "quantity": rng.choice([1, 2, None]),
+                "unit_price": rng.choice([None, 100, 12.5]),
+                "total_amount": rng.choice([rng.randint(50, 3000), round(rng.uniform(50, 3000), 2)]),
+            }
+            for _ in range(rng.randint(0, 5))
+        ]
+        header = {
+            "Date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "Buyer Name": f"Employee {rng.randint(1, 50)}",
+            "Number of days": rng.choice([1, 1, 2, 3]),
+        }
+        receipts.append((receipt_id, {"header": header, "line_items": line_items}))
+    return receipts
+
+
+def _uncovered_receipts():
+    # No policy-covered line item anywhere in the batch
+    header = {"Date": "2024-05-01", "Buyer Name": "Employee 1", "Number of days": 1}
+    return [
+        (1, {"header": header, "line_items": [{"description": "Beer", "total_amount": 400}]}),
+        (2, {"header": header, "line_items": [{"description": "CGST", "total_amount": 36}]}),
+        (3, {"header": header, "line_items": []}),
+    ]
+
+
+def _fresh_db(tmp, name):
+    close_thread_connections()
+    core_db.DB_PATH = os.path.join(tmp, name)
+    core_db.init_db()
+    load_policies()
+
+
+def _stored():
+    with core_db.get_cursor() as cur:
+        cur.execute("SELECT receipt_id, decision, details FROM validation_logs ORDER BY id")
+        logs = cur.fetchall()
+        cur.execute("SELECT * FROM spend_rollups ORDER BY 1, 2, 3, 4, 5")
+        return logs, cur.fetchall()
+
+
+def _edge_parity(tmp):
+    receipts = _uncovered_receipts()
+
+    _fresh_db(tmp, "edge_sequential.db")
+    sequential = [validate_receipt(receipt_id, data) for receipt_id, data in receipts]
+    sequential_stored = _stored()
+
+    _fresh_db(tmp, "edge_batch.db")
+    batch = validate_receipts_batch(receipts)
+    batch_stored = _stored()
+
+    return json.dumps(sequential) == json.dumps(batch) and sequential_stored == batch_stored
+
+
+def main(n=20_000):
+    receipts = _receipts(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        edge_ok = _edge_parity(tmp)
+
+        _fresh_db(tmp, "sequential.db")
+        start = time.perf_counter()
+        sequential = [validate_receipt(receipt_id, data) for receipt_id, data in receipts]
+        sequential_time = time.perf_counter() - start
+        sequential_stored = _stored()
+
+        _fresh_db(tmp, "batch.db")
+        start = time.perf_counter()
+        batch = validate_receipts_batch(receipts)
+        batch_time = time.perf_counter() - start
+        batch_stored = _stored()
+        close_thread_connections()
+
+    print(f"receipts:         {n}")
+    print(f"validate_receipt: {sequential_time:8.2f} s")
+    print(f"batch engine:     {batch_time:8.2f} s")
+    print(f"speedup:          {sequential_time / batch_time:8.1f}x")
+    print(f"identical JSON:   {json.dumps(sequential) == json.dumps(batch)}")
+    print(f"identical DB:     {sequential_stored == batch_stored}")
+    print(f"uncovered-only:   {edge_ok}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,73 @@
+"""
+Bank-feed ingestion throughput: insert_transactions_bulk on a fresh DB.
+
+    python -m benchmarks.bench_bulk_insert [rows] [invoices]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import dispute.db as dispute_db
+
+
+def _make_rows(n_rows, n_invoices):
+    rnd = random.Random(7)
+    return [
+        {
+            "transaction_date": f"2025-03-{1 + i % 28:02d}",
+            "narration": f"NEFT credit {i}",
+            "amount": round(rnd.uniform(1, 50), 2),
+            "bank_name": "HDFC",
+            "reference_number": f"REF{i}",
+            "account_number": "0001",
+            "account_type": "Current",
+            "payment_mode": "NEFT",
+            "currency": "INR",
+            "customer_id": 1,
+            "customer_name": "Bench Co",
+            "linked_invoice_id": f"INV-{i % n_invoices}",
+            "invoice_amount": 1_000_000.0
+        }
+        for i in range(n_rows)
+    ]
+
+
+def main(n_rows=100_000, n_invoices=2_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        dispute_db.DB_PATH = os.path.join(tmp, "bench.db")
+        dispute_db.init_dispute_tables()
+
+        from dispute.transaction_service import insert_transactions_bulk
+
+        with dispute_db.get_cursor() as cur:
+            cur.executemany("""
+                INSERT INTO invoices (
+                    invoice_number, invoice_date, due_date, invoice_type,
+                    currency, basic_amount, tax_amount, invoice_total_amount,
+                    customer_id, customer_name
+                )
+                VALUES (?, '2025-03-01', '2025-03-16', 'Standard', 'INR',
+                        1000000, 0, 1000000, 1, 'Bench Co')
+            """, [(f"INV-{i}",) for i in range(n_invoices)])
+
+        rows = _make_rows(n_rows, n_invoices)
+
+        start = time.perf_counter()
+        results = insert_transactions_bulk(rows)
+        elapsed = time.perf_counter() - start
+
+        from core.sqlite_pool import close_thread_connections
+        close_thread_connections()
+
+    accepted = sum(r["accepted"] for r in results)
+    print(f"rows:      {n_rows} across {n_invoices} invoices")
+    print(f"accepted:  {accepted}")
+    print(f"elapsed:   {elapsed:.2f} s")
+    print(f"rate:      {n_rows / elapsed:,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,144 @@
+"""
+analyze_invoices vs the columnar engine: a portfolio-wide timing
+run over `invoices` invoices (about 4.7 transactions each).
+
+    python -m benchmarks.bench_columnar_engine [invoices]
+
+Only the flat and reconcile_columnar paths are faster; nested
+output spends its time building per-transaction dicts either way.
+Parity is covered by tests/test_columnar_engine.py, which builds
+its DBs with _fresh_db: NULL deductions, unpaid, exactly settled
+and overpaid invoices.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from core.sqlite_pool import close_thread_connections
+from dispute import db as dispute_db
+from dispute.columnar_engine import analyze_invoices_columnar, reconcile_columnar
+from dispute.dispute_engine import analyze_invoices
+from dispute.transaction_service import INSERT_TRANSACTION_SQL
+
+INVOICE_ROWS_SQL = """
+    SELECT invoice_number, invoice_date, basic_amount, tax_amount,
+           invoice_total_amount, payment_status, currency
+    FROM invoices
+    {where}
+    ORDER BY invoice_date, iid
+"""
+
+
+def _fresh_db(path, seed, customers, invoices, transactions):
+    rng = random.Random(seed)
+    close_thread_connections()
+    dispute_db.DB_PATH = path
+    dispute_db.init_dispute_tables()
+
+    invoice_rows = []
+    for n in range(invoices):
+        basic = rng.choice([rng.randint(4, 400_000) / 4, round(rng.uniform(10, 90_000), 2)])
+        tax = rng.choice([0.0, round(basic * 0.18, 2), 12.5])
+        invoice_rows.append((
+            f"INV-{seed}-{n}",
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "2025-12-31", "Standard", rng.choice(["INR", "USD"]),
+            basic, tax, basic + tax, "PENDING",
+            rng.randint(1, customers), "Customer"
+        ))
+
+    per_invoice = max(1, transactions // invoices)
+    payments = []
+    for inv in invoice_rows:
+        total = inv[7]
+        scenario = rng.choice(["unpaid", "settled", "partial", "overpaid", "random"])
+        if scenario == "unpaid":
+            amounts = []
+        elif scenario == "settled":
+            # Halves add back up exactly, so outstanding is really 0
+            amounts = rng.choice([[total], [total / 2, total / 2]])
+        elif scenario == "overpaid":
+            amounts = [total, rng.randint(1, 400) / 4]
+        else:
+            share = total / (2 * per_invoice) if scenario == "partial" else total
+            amounts = [round(rng.uniform(0.01, share), 2)
+                       for _ in range(rng.randint(1, 2 * per_invoice - 1))]
+        payments.extend((inv, amount) for amount in amounts)
+
+    # Interleave invoices in tid order, as real payments arrive
+    rng.shuffle(payments)
+
+    txn_rows = []
+    for inv, amount in payments:
+        # INSERT_TRANSACTION_SQL column order
+        txn_rows.append((
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            rng.choice(["NEFT", None, "UPI/REF"]),
+            amount, "HDFC", None, "0001", "Current", "NEFT", inv[4],
+            rng.choice([0, 12.5, None]),
+            rng.choice([0, round(amount * 0.02, 2), None]),
+            rng.choice([0, 3.25]),
+            rng.choice([0, None, 1.1]),
+            inv[9], "Customer", inv[0], inv[7]
+        ))
+
+    with dispute_db.get_cursor() as cur:
+        # Balances are not read by either engine
+        cur.execute("DROP TRIGGER IF EXISTS trg_invoice_balances_insert")
+        cur.executemany("""
+            INSERT INTO invoices (
+                invoice_number, invoice_date, due_date, invoice_type,
+                currency, basic_amount, tax_amount, invoice_total_amount,
+                payment_status, customer_id, customer_name
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, invoice_rows)
+        cur.executemany(INSERT_TRANSACTION_SQL, txn_rows)
+
+    return rng
+
+
+def _invoice_rows(customer_id=None, from_date="0000-00-00", to_date="9999-99-99"):
+    where = "WHERE invoice_date BETWEEN ? AND ?"
+    params = [from_date, to_date]
+    if customer_id is not None:
+        where += " AND customer_id = ?"
+        params.append(customer_id)
+
+    with dispute_db.get_cursor() as cur:
+        cur.execute(INVOICE_ROWS_SQL.format(where=where), params)
+        return cur.fetchall()
+
+
+def timing(invoices):
+    with tempfile.TemporaryDirectory() as tmp:
+        _fresh_db(os.path.join(tmp, "portfolio.db"), 42,
+                  customers=50, invoices=invoices, transactions=invoices * 10)
+        with dispute_db.get_cursor() as cur:
+            cur.execute("SELECT (SELECT COUNT(*) FROM invoices), COUNT(*) FROM transactions")
+            print("portfolio: {:,} invoices, {:,} transactions".format(*cur.fetchone()))
+
+        runs = [
+            ("analyze_invoices", lambda: analyze_invoices(_invoice_rows())),
+            ("columnar, nested", lambda: analyze_invoices_columnar()),
+            ("columnar, flat", lambda: analyze_invoices_columnar(include_transactions=False)),
+            ("reconcile_columnar", lambda: reconcile_columnar()),
+        ]
+
+        baseline = None
+        for label, run in runs:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{label:<20} {elapsed:7.2f} s  {baseline / elapsed:5.1f}x")
+        close_thread_connections()
+
+
+def main(invoices=200_000):
+    timing(invoices)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
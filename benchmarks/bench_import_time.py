@@ -0,0 +1,97 @@
+"""
+Cold-start import cost of app.py, measured with `python -X importtime`.
+
+    python -m benchmarks.bench_import_time [--baseline <git-rev>] [runs]
+
+Imports every module app.py imports at top level (without running
+the Streamlit script) in a fresh interpreter, `runs` times, and
+reports the best total plus the heaviest top-level imports. With
+--baseline, the same is measured on a `git archive` of that
+revision for comparison.
+"""
+import ast
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def app_imports(tree_dir):
+    with open(os.path.join(tree_dir, "app.py"), encoding="utf-8") as f:
+        module = ast.parse(f.read())
+
+    names = []
+    for node in module.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def measure(tree_dir, runs):
+    code = "import " + ", ".join(app_imports(tree_dir))
+    env = {**os.environ, "PYTHONPATH": tree_dir}
+    best = None
+
+    for _ in range(runs):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=tree_dir, env=env, capture_output=True, text=True, check=True
+        ).stderr
+
+        top_level = {}
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if not name[1:].startswith(" "):
+                top_level[name.strip()] = int(cumulative)
+
+        total = sum(top_level.values())
+        if best is None or total < best[0]:
+            best = (total, top_level)
+
+    return best
+
+
+def report(label, result, top=6):
+    total, top_level = result
+    print(f"{label:<10} {total / 1e6:6.3f} s")
+    for name, us in sorted(top_level.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"    {us / 1e6:6.3f} s  {name}")
+    return total
+
+
+def main(baseline=None, runs=5):
+    current = report("current", measure(ROOT, runs))
+    if baseline is None:
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "tree.tar")
+        subprocess.run(
+            ["git", "archive", "-o", archive, baseline],
+            cwd=ROOT, check=True
+        )
+        with tarfile.open(archive) as tar:
+            tar.extractall(tmp)
+
+        before = report(baseline, measure(tmp, runs))
+
+    print(f"cold-start import: {before / current:4.1f}x faster "
+          f"({(before - current) / 1e6:.3f} s saved)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    rev = None
+    if "--baseline" in args:
+        i = args.index("--baseline")
+        rev = args[i + 1]
+        del args[i:i + 2]
+
+    main(rev, int(args[0]) if args else 5)
@@ -0,0 +1,62 @@
+"""
+detect_intent over synthetic line items: substring scan vs word index.
+
+    python -m benchmarks.bench_intent_matcher [items]
+"""
+import random
+import sys
+import time
+
+from core.expense_intents import INTENT_KEYWORDS, detect_intent, rebuild_matcher
+
+FILLER = [
+    "premium", "charges", "service", "item", "qty", "per", "unit",
+    "barcode", "price", "special", "combo", "hours", "usage", "month"
+]
+
+
+def _legacy_detect_intent(description):
+    if not description:
+        return None
+
+    desc = description.lower()
+    for intent, keywords in INTENT_KEYWORDS.items():
+        if any(k in desc for k in keywords):
+            return intent
+    return None
+
+
+def _line_items(n, seed=7):
+    rng = random.Random(seed)
+    keywords = [k for ks in INTENT_KEYWORDS.values() for k in ks]
+    items = []
+    for _ in range(n):
+        words = rng.sample(FILLER, rng.randint(2, 5))
+        if rng.random() < 0.8:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).title())
+        items.append(" ".join(words))
+    return items
+
+
+def _run(fn, items):
+    start = time.perf_counter()
+    hits = sum(1 for item in items if fn(item))
+    return time.perf_counter() - start, hits
+
+
+def main(n=1_000_000):
+    items = _line_items(n)
+    rebuild_matcher()
+
+    legacy, legacy_hits = _run(_legacy_detect_intent, items)
+    compiled, compiled_hits = _run(detect_intent, items)
+
+    print(f"line items:      {n}")
+    print(f"substring scan:  {legacy:8.2f} s  ({legacy_hits} matched)")
+    print(f"keyword index:   {compiled:8.2f} s  ({compiled_hits} matched)")
+    print(f"speedup:         {legacy / compiled:8.1f}x")
+    print("(match counts differ where substrings hit inside other words)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,71 @@
+"""
+Page-parallel PDF extraction scaling on a synthetic statement.
+
+    python -m benchmarks.bench_pdf_extract [pages] [path/to/statement.pdf]
+
+Without a path, a plain-text statement of `pages` pages is generated.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from core.pdf_extract import extract_pages
+
+
+def _write_statement_pdf(path, pages, lines_per_page=45):
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+
+    for p in range(pages):
+        lines = [f"BT /F1 8 Tf 30 {800 - 16 * i} Td "
+                 f"(2025-03-{1 + i % 28:02d} NEFT CREDIT REF{p:04d}{i:03d} "
+                 f"{(p * lines_per_page + i) * 1.37:,.2f} INR) Tj ET"
+                 for i in range(lines_per_page)]
+        stream = "\n".join(lines)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(out)
+
+
+def main(pages=240, path=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        if path is None:
+            path = os.path.join(tmp, "statement.pdf")
+            _write_statement_pdf(path, pages)
+
+        baseline = None
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            text = extract_pages(path, "text", workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} {elapsed:7.2f} s  "
+                  f"speedup {baseline / elapsed:4.1f}x  pages={len(text)}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 240,
+        sys.argv[2] if len(sys.argv) > 2 else None
+    )
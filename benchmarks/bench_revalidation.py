@@ -0,0 +1,75 @@
+"""
+Policy replay over stored line items (no LLM) for synthetic receipts.
+
+    python -m benchmarks.bench_revalidation [receipts]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import core.db as core_db
+from core.policy_loader import load_policies
+from core.receipt_agent import INSERT_LINE_ITEM_SQL, INSERT_RECEIPT_SQL, line_item_params, receipt_params
+from core.revalidation import revalidate_receipts
+from core.sqlite_pool import close_thread_connections
+
+DESCRIPTIONS = [
+    "Veg thali lunch", "Paneer tikka", "Mineral water", "Room charges",
+    "Uber cab ride", "AWS EC2 usage", "SaaS subscription", "Laundry",
+    "Driver allowance", "CGST", "SGST", "Conference pass", "Beer"
+]
+
+
+def _seed(n, seed=11):
+    rng = random.Random(seed)
+    receipts = []
+    items = []
+    for receipt_id in range(1, n + 1):
+        header = {
+            "Date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "Buyer Name": f"Employee {rng.randint(1, 200)}",
+            "Number of days": rng.choice([1, 1, 1, 2, 3]),
+        }
+        line_items = [
+            {
+                "description": rng.choice(DESCRIPTIONS),
+                "quantity": 1,
+                "unit_price": None,
+                "total_amount": round(rng.uniform(50, 3000), 2),
+            }
+            for _ in range(rng.randint(1, 5))
+        ]
+        receipts.append(receipt_params(header, None))
+        items.extend(line_item_params(receipt_id, line_items))
+
+    with core_db.get_cursor() as cur:
+        cur.executemany(INSERT_RECEIPT_SQL, receipts)
+        cur.executemany(INSERT_LINE_ITEM_SQL, items)
+    return len(items)
+
+
+def main(n=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        core_db.DB_PATH = os.path.join(tmp, "bench.db")
+        core_db.init_db()
+        load_policies()
+
+        start = time.perf_counter()
+        item_count = _seed(n)
+        seeded = time.perf_counter() - start
+
+        dry = revalidate_receipts(dry_run=True)
+        replay = revalidate_receipts()
+        close_thread_connections()
+
+    print(f"receipts:        {n} ({item_count} line items, seeded in {seeded:.1f} s)")
+    print(f"dry run:         {dry['elapsed_seconds']:8.2f} s")
+    print(f"replay + write:  {replay['elapsed_seconds']:8.2f} s  "
+          f"({replay['approved']} approved, {replay['rejected']} rejected)")
+    print(f"throughput:      {n / replay['elapsed_seconds']:8.0f} receipts/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
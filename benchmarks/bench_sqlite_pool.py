@@ -0,0 +1,66 @@
+"""
+Per-call overhead of get_cursor(): connect-per-call vs pooled connection.
+
+    python -m benchmarks.bench_sqlite_pool [calls]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from core.sqlite_pool import pooled_cursor, close_thread_connections
+
+
+def _seed(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE invoices (invoice_number TEXT, invoice_total_amount REAL)")
+    conn.executemany(
+        "INSERT INTO invoices VALUES (?, ?)",
+        [(f"INV-{i}", i * 10.0) for i in range(1000)]
+    )
+    conn.commit()
+    conn.close()
+
+
+@contextmanager
+def _legacy_cursor(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    cur = conn.cursor()
+    try:
+        yield cur
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _run(cursor_factory, db_path, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        with cursor_factory(db_path) as cur:
+            cur.execute(
+                "SELECT invoice_total_amount FROM invoices WHERE invoice_number = ?",
+                (f"INV-{i % 1000}",)
+            )
+            cur.fetchone()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(calls=5000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        _seed(db_path)
+
+        legacy = _run(_legacy_cursor, db_path, calls)
+        pooled = _run(pooled_cursor, db_path, calls)
+        close_thread_connections()
+
+    print(f"calls:            {calls}")
+    print(f"connect per call: {legacy:8.1f} us/call")
+    print(f"pooled:           {pooled:8.1f} us/call")
+    print(f"speedup:          {legacy / pooled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
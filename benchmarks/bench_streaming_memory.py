@@ -0,0 +1,150 @@
+"""
+Peak RSS of streaming vs fetchall() reads as the transactions
+table grows.
+
+    python -m benchmarks.bench_streaming_memory [rows] [fetchall_max]
+
+Builds a temporary DB in four steps up to `rows` transactions
+(default 5M) for one customer and, at each size, runs every
+consumer in a fresh interpreter and reports its peak RSS. The
+fetchall() baselines are skipped above `fetchall_max` rows
+(default 1M) to stay clear of the OOM killer.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from dispute import db as dispute_db
+
+TRANSACTIONS_PER_INVOICE = 100
+
+CONSUMERS = ("iter_transactions", "export_csv", "iter_invoice_analysis",
+             "fetch_transactions", "analyze_invoices")
+FETCHALL_CONSUMERS = ("fetch_transactions", "analyze_invoices")
+
+
+def _grow(first, last):
+    with dispute_db.get_cursor() as cur:
+        cur.execute("""
+            WITH RECURSIVE n(i) AS (
+                SELECT ? UNION ALL SELECT i + 1 FROM n WHERE i < ?
+            )
+            INSERT OR IGNORE INTO invoices (
+                invoice_number, invoice_date, due_date, invoice_type,
+                currency, basic_amount, tax_amount, invoice_total_amount,
+                payment_status, customer_id, customer_name
+            )
+            SELECT 'INV-' || i, date('2024-01-01', '+' || (i % 700) || ' days'),
+                   date('2024-01-16', '+' || (i % 700) || ' days'), 'Standard',
+                   'INR', 100000, 18000, 118000, 'PARTIALLY_PAID', 1, 'Acme'
+            FROM n
+        """, (first // TRANSACTIONS_PER_INVOICE, (last - 1) // TRANSACTIONS_PER_INVOICE))
+
+        cur.execute("""
+            WITH RECURSIVE n(i) AS (
+                SELECT ? UNION ALL SELECT i + 1 FROM n WHERE i < ?
+            )
+            INSERT INTO transactions (
+                transaction_date, narration, amount, bank_name,
+                reference_number, account_number, account_type,
+                payment_mode, currency, customer_id, customer_name,
+                linked_invoice_id, invoice_amount
+            )
+            SELECT date('2024-01-01', '+' || (i % 730) || ' days'),
+                   'NEFT CREDIT ' || i, (i % 9973) * 1.25, 'HDFC',
+                   'REF' || i, '000123456789', 'Current', 'NEFT', 'INR',
+                   1, 'Acme', 'INV-' || (i / ?), 118000
+            FROM n
+        """, (first, last - 1, TRANSACTIONS_PER_INVOICE))
+
+
+def _build_step(first, last):
+    # Balances are not read here; skip the per-row trigger
+    with dispute_db.get_cursor() as cur:
+        cur.execute("DROP TRIGGER IF EXISTS trg_invoice_balances_insert")
+
+    for start in range(first, last, 500_000):
+        _grow(start, min(start + 500_000, last))
+
+
+def _consume(consumer):
+    # Runs in the child process
+    if consumer == "iter_transactions":
+        from dispute.transaction_service import iter_transactions
+        return sum(1 for _ in iter_transactions())
+
+    if consumer == "export_csv":
+        from dispute.export import export_transactions_csv
+        with open(os.devnull, "w", newline="") as out:
+            return export_transactions_csv(out)
+
+    if consumer == "iter_invoice_analysis":
+        from dispute.dispute_engine import iter_invoice_analysis
+        return sum(len(r["transactions"]) for r in iter_invoice_analysis(1))
+
+    if consumer == "fetch_transactions":
+        from dispute.transaction_service import fetch_transactions
+        return len(fetch_transactions())
+
+    if consumer == "analyze_invoices":
+        from dispute.dispute_engine import analyze_invoices
+        from dispute.invoice_service import fetch_invoices_by_customer_and_date
+        invoices = fetch_invoices_by_customer_and_date(1, "0000-00-00", "9999-99-99")
+        return sum(len(r["transactions"]) for r in analyze_invoices(invoices))
+
+    raise ValueError(consumer)
+
+
+def _peak_rss_kb():
+    # VmHWM, not ru_maxrss: the latter carries the parent's peak
+    # across fork/exec, and the parent grows while building the DB
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmHWM unavailable (Linux only)")
+
+
+def _run_child(db_path, consumer):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming_memory",
+         "--child", db_path, consumer],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return int(out[0]), int(out[1]) / 1024, float(out[2])
+
+
+def main(rows=5_000_000, fetchall_max=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        dispute_db.DB_PATH = os.path.join(tmp, "stream.db")
+        dispute_db.init_dispute_tables()
+
+        print(f"{'rows':>10}  {'consumer':<22} {'peak RSS':>10} {'time':>8}")
+        built = 0
+        for step in range(1, 5):
+            target = rows * step // 4
+            _build_step(built, target)
+            built = target
+
+            for consumer in CONSUMERS:
+                if consumer in FETCHALL_CONSUMERS and target > fetchall_max:
+                    continue
+                seen, rss_mb, elapsed = _run_child(dispute_db.DB_PATH, consumer)
+                assert seen == target, (consumer, seen, target)
+                print(f"{target:>10,}  {consumer:<22} {rss_mb:>7.0f} MB {elapsed:>7.1f}s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        dispute_db.DB_PATH = sys.argv[2]
+        start = time.perf_counter()
+        seen = _consume(sys.argv[3])
+        elapsed = time.perf_counter() - start
+        print(seen, _peak_rss_kb(), elapsed)
+    else:
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+        )
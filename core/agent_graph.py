@@ -1,7 +1,5 @@
-from langgraph.graph import StateGraph
+import threading
 from typing import TypedDict
-from core.receipt_agent import analyze_receipt
-from core.validation_agent import validate_receipt
 
 
 class FinanceState(TypedDict, total=False):
@@ -13,6 +11,8 @@ class FinanceState(TypedDict, total=False):
 
 
 def receipt_node(state: FinanceState) -> FinanceState:
+    from core.receipt_agent import analyze_receipt
+
     result = analyze_receipt(
         state["file_path"],
         state["llm_provider"]
@@ -21,6 +21,8 @@ def receipt_node(state: FinanceState) -> FinanceState:
 
 
 def validation_node(state: FinanceState) -> FinanceState:
+    from core.validation_agent import validate_receipt
+
     validation = validate_receipt(
         receipt_id=state["receipt_id"],
         receipt_data=state["receipt_data"]
@@ -28,15 +30,40 @@ def validation_node(state: FinanceState) -> FinanceState:
     return {**state, "validation": validation}
 
 
-graph = StateGraph(
-    FinanceState,
-    input_keys=["file_path", "llm_provider"]
-)
+# langgraph and the receipt parser stack cost about a second to
+# import, so the graph is compiled on first use, not at import
+_lock = threading.Lock()
+_finance_graph = None
+
+
+def _build_graph():
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(
+        FinanceState,
+        input_keys=["file_path", "llm_provider"]
+    )
+
+    graph.add_node("receipt", receipt_node)
+    graph.add_node("validate", validation_node)
+
+    graph.set_entry_point("receipt")
+    graph.add_edge("receipt", "validate")
+
+    return graph.compile()
+
+
+def get_finance_graph():
+    global _finance_graph
 
-graph.add_node("receipt", receipt_node)
-graph.add_node("validate", validation_node)
+    with _lock:
+        if _finance_graph is None:
+            _finance_graph = _build_graph()
+        return _finance_graph
 
-graph.set_entry_point("receipt")
-graph.add_edge("receipt", "validate")
 
-finance_graph = graph.compile()
+def __getattr__(name):
+    # Keeps `from core.agent_graph import finance_graph` working
+    if name == "finance_graph":
+        return get_finance_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+# -------------------------------------------------
+# ONE PROCESS-WIDE EVENT LOOP
+# -------------------------------------------------
+# Async LLM clients keep pooled connections bound to the loop
+# they were first used on, so every coroutine that touches them
+# runs here instead of in a fresh asyncio.run() loop.
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever,
+                name="async-runtime",
+                daemon=True
+            ).start()
+        return _loop
+
+
+def run_async(coro):
+    """Runs coro on the shared loop and blocks for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
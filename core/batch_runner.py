@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.async_runtime import run_async
+from core.db import get_cursor
+from core.document_cache import file_sha256, get_cached, get_cached_text, put_cached_many
+from core.document_parser import extract_text
+from core.llm_scheduler import ainvoke_llm
+from core.pdf_extract import PDF_WORKERS
+from core.receipt_agent import (
+    INSERT_LINE_ITEM_SQL,
+    INSERT_RECEIPT_SQL,
+    PROMPT_VERSION,
+    RECEIPT_PROMPT,
+    line_item_params,
+    parse_receipt_response,
+    receipt_params
+)
+from core.batch_validation import validate_receipts_batch
+from core.policy_cache import get_policy_table
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# BATCH LIMITS
+# -------------------------------------------------
+RECEIPT_EXTENSIONS = (".pdf", ".docx")
+BATCH_MAX_CONCURRENCY = 8      # receipts in flight; the scheduler paces the LLM further
+BATCH_FLUSH_SIZE = 100         # receipts per bulk insert
+FILE_MAX_RETRIES = 2           # extra passes over failed files
+PROGRESS_LOG_EVERY = 25
+
+
+def collect_receipt_files(source) -> list:
+    """A directory (non-recursive) or an iterable of file paths."""
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(RECEIPT_EXTENSIONS)
+        )
+    if isinstance(source, (str, os.PathLike)):
+        return [os.fspath(source)]
+    return [os.fspath(path) for path in source]
+
+
+def _cache_lookup(file_path, llm_provider):
+    """(content_sha256, full cache hit or None, cached text or None)."""
+    content_sha256 = file_sha256(file_path)
+    cached = get_cached(content_sha256, llm_provider, PROMPT_VERSION)
+    if cached:
+        return content_sha256, cached, None
+    return content_sha256, None, get_cached_text(content_sha256)
+
+
+async def _extract_and_parse(file_path, llm_provider, pool):
+    """
+    analyze_receipt up to (not including) the database write:
+    cache lookup on a worker thread, text extraction in the process
+    pool, async LLM call. Returns (raw_text, parsed, cache_key);
+    cache_key is the content hash to cache the result under, or None
+    when there is nothing new to cache. The cache write itself goes
+    with the receipts in _write_receipts.
+    """
+    loop = asyncio.get_running_loop()
+
+    content_sha256, cached, raw_text = await loop.run_in_executor(
+        None, _cache_lookup, file_path, llm_provider
+    )
+    if cached:
+        return cached["raw_text"], cached["parsed"], None
+
+    if raw_text is None:
+        # One page-extraction worker per file: the pool already
+        # spreads files across processes
+        raw_text = await loop.run_in_executor(pool, extract_text, file_path, 1)
+
+    response = await ainvoke_llm(llm_provider, RECEIPT_PROMPT.format(receipt_text=raw_text))
+
+    parsed, ok = parse_receipt_response(response.content)
+    return raw_text, parsed, content_sha256 if ok else None
+
+
+def _write_receipts(parsed_files, policy_table, llm_provider=None, cache_entries=()):
+    """
+    Bulk insert of parsed receipts, their line items, validation logs
+    and ledger spend in one transaction. parsed_files is [(result, raw_text,
+    parsed)]; each result dict gets its receipt_id and decision
+    filled in. cache_entries ([(content_sha256, raw_text, parsed)]
+    for llm_provider) go into the document cache in the same
+    transaction.
+    """
+    if not parsed_files:
+        return
+
+    with get_cursor() as cur:
+        if not cur.connection.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+
+        # Ids are assigned in insert order while we hold the write lock
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM receipts")
+        last_id = cur.fetchone()[0]
+
+        cur.executemany(INSERT_RECEIPT_SQL, [
+            receipt_params(parsed.get("header", {}), raw_text)
+            for _, raw_text, parsed in parsed_files
+        ])
+
+        cur.execute("SELECT id FROM receipts WHERE id > ? ORDER BY id", (last_id,))
+        receipt_ids = [row[0] for row in cur.fetchall()]
+
+        cur.executemany(INSERT_LINE_ITEM_SQL, [
+            row
+            for receipt_id, (_, _, parsed) in zip(receipt_ids, parsed_files)
+            for row in line_item_params(receipt_id, parsed.get("line_items", []))
+        ])
+
+        # Same decisions as sequential validate_receipt calls,
+        # logs and ledger spend written in this transaction
+        validations = validate_receipts_batch([
+            (receipt_id, {
+                "header": parsed.get("header", {}),
+                "line_items": parsed.get("line_items", [])
+            })
+            for receipt_id, (_, _, parsed) in zip(receipt_ids, parsed_files)
+        ], policy_table)
+
+        put_cached_many(cache_entries, llm_provider, PROMPT_VERSION)
+
+    for receipt_id, validation, (result, _, _) in zip(receipt_ids, validations, parsed_files):
+        result["receipt_id"] = receipt_id
+        result["decision"] = validation["decision"]
+        result["validation"] = validation
+
+
+class _Progress:
+
+    def __init__(self, total, callback):
+        self.total = total
+        self.callback = callback
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed else 0.0
+
+    def update(self, ok):
+        self.done += ok
+        self.failed += not ok
+        self._report()
+
+    def revert(self, count):
+        """Moves `count` files already counted as done to failed."""
+        self.done -= count
+        self.failed += count
+        self._report()
+
+    def _report(self):
+        finished = self.done + self.failed
+        if finished % PROGRESS_LOG_EVERY == 0 or finished == self.total:
+            logger.info("Receipt batch: %s/%s done, %s failed, %.2f receipts/s",
+                        self.done, self.total, self.failed, self.rate)
+        if self.callback:
+            self.callback(self.done, self.total, self.failed, self.rate)
+
+
+async def _arun_batch(files, llm_provider, max_concurrency, workers,
+                      max_file_retries, progress):
+    policy_table = get_policy_table()
+    results = [
+        {"file": path, "receipt_id": None, "decision": None,
+         "validation": None, "error": None, "attempts": 0}
+        for path in files
+    ]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+    # (index, raw_text, parsed, cache_key) of parsed files not yet written
+    pending_writes = []
+    flush_lock = asyncio.Lock()
+    flush_failed = []
+
+    async def flush():
+        """
+        Writes pending_writes on a worker thread, one flush at a time
+        so ledger spend is applied in order. A failed flush marks its
+        files failed so they are retried.
+        """
+        async with flush_lock:
+            batch = list(pending_writes)
+            pending_writes.clear()
+            if not batch:
+                return
+            try:
+                await loop.run_in_executor(None, _write_receipts, [
+                    (results[i], raw_text, parsed) for i, raw_text, parsed, _ in batch
+                ], policy_table, llm_provider, [
+                    (key, raw_text, parsed) for _, raw_text, parsed, key in batch if key
+                ])
+            except Exception as e:
+                logger.warning("Bulk write of %s receipt(s) failed: %s", len(batch), e)
+                for i, _, _, _ in batch:
+                    results[i]["error"] = f"{type(e).__name__}: {e}"
+                flush_failed.extend(i for i, _, _, _ in batch)
+                progress.revert(len(batch))
+
+    def take_failed(failed):
+        merged = sorted(set(failed) | set(flush_failed))
+        flush_failed.clear()
+        return merged
+
+    async def process(index, pool):
+        result = results[index]
+        result["attempts"] += 1
+        try:
+            async with semaphore:
+                raw_text, parsed, cache_key = await _extract_and_parse(
+                    result["file"], llm_provider, pool
+                )
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            progress.update(False)
+            return False
+
+        result["error"] = None
+        pending_writes.append((index, raw_text, parsed, cache_key))
+        progress.update(True)
+        if len(pending_writes) >= BATCH_FLUSH_SIZE:
+            await flush()
+        return True
+
+    # ----------------------------------
+    # 1. Whole batch, bounded concurrency
+    # ----------------------------------
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = await asyncio.gather(*(process(i, pool) for i in range(len(files))))
+    await flush()
+
+    # ----------------------------------
+    # 2. Failed files again, one at a time
+    #    (fresh pool in case a worker crashed and broke the old one)
+    # ----------------------------------
+    failed = take_failed(i for i, ok in enumerate(outcomes) if not ok)
+    for attempt in range(max_file_retries):
+        if not failed:
+            break
+        logger.info("Retrying %s failed receipt(s), pass %s of %s",
+                    len(failed), attempt + 1, max_file_retries)
+        progress.failed -= len(failed)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            failed = [i for i in failed if not await process(i, pool)]
+        await flush()
+        failed = take_failed(failed)
+
+    return results
+
+
+def process_receipt_batch(source, llm_provider="groq",
+                          max_concurrency=BATCH_MAX_CONCURRENCY,
+                          workers=None, max_file_retries=FILE_MAX_RETRIES,
+                          progress=None) -> dict:
+    """
+    Batch finance_graph: extraction and validation for a directory
+    or list of receipt files. PDF parsing runs in a process pool,
+    LLM calls run concurrently on the shared event loop, and
+    receipts / validation logs are bulk inserted on a worker thread.
+    Files whose bulk insert fails are retried like failed parses.
+
+    progress(done, total, failed, receipts_per_second) is called
+    from the event loop thread after every file.
+    """
+    files = collect_receipt_files(source)
+    tracker = _Progress(len(files), progress)
+
+    results = run_async(_arun_batch(
+        files,
+        llm_provider,
+        max_concurrency,
+        max(1, workers or PDF_WORKERS),
+        max_file_retries,
+        tracker
+    )) if files else []
+
+    elapsed = time.perf_counter() - tracker.started
+    succeeded = sum(1 for r in results if r["error"] is None)
+
+    return {
+        "total": len(files),
+        "succeeded": succeeded,
+        "failed": len(files) - succeeded,
+        "retried": sum(1 for r in results if r["attempts"] > 1),
+        "elapsed_seconds": round(elapsed, 2),
+        "receipts_per_second": round(succeeded / elapsed, 2) if elapsed else 0.0,
+        "results": results
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from core.startup import ensure_started
+
+    if len(sys.argv) < 2:
+        raise SystemExit("usage: python -m core.batch_runner <dir|file>... [--provider groq]")
+
+    args = sys.argv[1:]
+    provider = "groq"
+    if "--provider" in args:
+        i = args.index("--provider")
+        provider = args[i + 1]
+        del args[i:i + 2]
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    load_dotenv()
+    ensure_started()
+
+    sources = [f for arg in args for f in collect_receipt_files(arg)]
+    report = process_receipt_batch(sources, provider)
+
+    for r in report["results"]:
+        if r["error"]:
+            print(f"FAILED {r['file']}: {r['error']}")
+    print(
+        f"{report['succeeded']}/{report['total']} receipts in "
+        f"{report['elapsed_seconds']}s ({report['receipts_per_second']}/s), "
+        f"{report['retried']} retried."
+    )
+    sys.exit(1 if report["failed"] else 0)
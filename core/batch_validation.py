@@ -0,0 +1,429 @@
+import json
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from core.db import get_cursor
+from core.expense_intents import detect_intent, intent_to_policy, intent_to_sub_category
+from core.policy_cache import get_policy_table
+from core.spend_ledger import (
+    FREQUENCY_PERIOD,
+    coverage_days,
+    normalize_buyer,
+    insert_spend_rows,
+    normalize_spend_date,
+    spend_rows
+)
+from core.validation_agent import evaluate_receipt, log_validations, resolve_unit_price
+
+# -------------------------------------------------
+# VECTORIZED VALIDATE_RECEIPT
+# -------------------------------------------------
+# Same decisions and the same JSON as calling validate_receipt on
+# each receipt in order, computed over column arrays: intents are
+# detected once per distinct description, category totals come
+# from one grouped reduction and limit checks run as array
+# comparisons. Receipts whose limit windows depend on spend
+# approved earlier in the batch are checked in later "waves",
+# against an in-memory copy of the ledger rollups.
+
+UNCOVERED, STATUTORY, COVERED = 0, 1, 2
+
+REJECTED_EXPLANATION = (
+    "Receipt contains expenses that are either not covered "
+    "by company policy or violate defined limits."
+)
+APPROVED_EXPLANATION = "All receipt expenses comply with company policies."
+
+
+@lru_cache(maxsize=8192)
+def _dates(start, days):
+    first = date.fromisoformat(start)
+    return tuple((first + timedelta(days=d)).isoformat() for d in range(days))
+
+
+class _LedgerSnapshot:
+    """spend_rollups for the batch's buyers, kept current as receipts are approved."""
+
+    def __init__(self, cur, buyers, receipt_ids, first_day, last_day):
+        cur.execute("""
+            SELECT buyer, category, sub_category, period, period_key, amount
+            FROM spend_rollups
+            WHERE buyer IN (SELECT value FROM json_each(?))
+              AND (period != 'day' OR period_key BETWEEN ? AND ?)
+        """, (json.dumps(sorted(buyers)), first_day, last_day))
+        self.rollups = {tuple(row[:5]): row[5] for row in cur.fetchall()}
+
+        # Rows INSERT OR IGNORE would skip
+        cur.execute("""
+            SELECT receipt_id, category, sub_category, spend_date
+            FROM spend_entries
+            WHERE receipt_id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(sorted(receipt_ids)),))
+        self.recorded = set(cur.fetchall())
+
+    def prior(self, buyer, category, sub_category, period, start, days):
+        """fetch_period_spend against the snapshot."""
+        key = (buyer, category, sub_category or "")
+        if period == "day":
+            values = [
+                self.rollups[k]
+                for k in (key + ("day", d) for d in _dates(start, days))
+                if k in self.rollups
+            ]
+            value = max(values) if values else None
+        else:
+            value = self.rollups.get(key + (period, start[:7] if period == "month" else "all"))
+        return value or 0
+
+    def apply(self, rows):
+        """What the spend_entries triggers do, in the same order."""
+        for receipt_id, buyer, category, sub_category, spend_date, amount in rows:
+            entry = (receipt_id, category, sub_category, spend_date)
+            if entry in self.recorded:
+                continue
+            self.recorded.add(entry)
+            for period, period_key in (("day", spend_date), ("month", spend_date[:7]), ("total", "all")):
+                k = (buyer, category, sub_category, period, period_key)
+                self.rollups[k] = self.rollups[k] + amount if k in self.rollups else amount
+
+
+def _window_keys(buyer, category, sub_category, period, start, days):
+    key = (buyer, category, sub_category or "")
+    if period == "day":
+        return [key + ("day", d) for d in _dates(start, days)]
+    return [key + (period, start[:7] if period == "month" else "all")]
+
+
+def _schedule_waves(receipt_reads, receipt_writes):
+    """
+    Wave per receipt so that each ledger key sees its reads and
+    writes in receipt order: a read waits for earlier writes, a
+    write waits for earlier reads and writes. Reads of a wave run
+    before its writes.
+    """
+    last_read, last_write = {}, {}
+    waves = []
+    for reads, writes in zip(receipt_reads, receipt_writes):
+        wave = 0
+        for k in reads:
+            if k in last_write:
+                wave = max(wave, last_write[k] + 1)
+        for k in writes:
+            wave = max(wave, last_write.get(k, 0), last_read.get(k, 0))
+        for k in reads:
+            last_read[k] = max(last_read.get(k, 0), wave)
+        for k in writes:
+            last_write[k] = wave
+        waves.append(wave)
+    return np.asarray(waves, dtype=int)
+
+
+def validate_receipts_batch(receipts, policy_table=None, use_ledger=True, write=True) -> list:
+    """
+    validate_receipt for many receipts at once. receipts is
+    [(receipt_id, receipt_data)] in the order they would have been
+    validated one by one; returns their results in that order.
+
+    With write, validation_logs rows go in with one executemany
+    and approved spend with another, in a single transaction.
+    """
+    receipts = list(receipts)
+    results = [None] * len(receipts)
+
+    # ----------------------------------
+    # 1. Flatten line items into columns
+    # ----------------------------------
+    item_receipt, descs, raw_amounts, unit_prices = [], [], [], []
+    for r, (_, receipt_data) in enumerate(receipts):
+        line_items = receipt_data.get("line_items", [])
+        if not line_items:
+            results[r] = evaluate_receipt(receipt_data)
+            continue
+        for item in line_items:
+            item_receipt.append(r)
+            descs.append((item.get("description") or "").lower())
+            raw_amounts.append(item.get("total_amount") or 0)
+            unit_prices.append(resolve_unit_price(item))
+
+    if not descs:
+        return results
+
+    if policy_table is None:
+        policy_table = get_policy_table()
+
+    item_receipt = np.asarray(item_receipt)
+
+    # ----------------------------------
+    # 2. Intents, once per distinct description
+    # ----------------------------------
+    desc_codes, unique_descs = pd.factorize(pd.Series(descs, dtype=object))
+
+    pair_index = {}
+    unique_pair = np.empty(len(unique_descs), dtype=int)
+    for u, desc in enumerate(unique_descs):
+        intent = detect_intent(desc)
+        pair = (intent_to_policy(intent), intent_to_sub_category(intent, desc))
+        unique_pair[u] = pair_index.setdefault(pair, len(pair_index))
+    pairs = list(pair_index)
+
+    pair_kind = np.array([
+        UNCOVERED if category == "UNSUPPORTED"
+        else STATUTORY if category == "Statutory"
+        else COVERED
+        for category, _ in pairs
+    ])
+    pair_policy = [
+        policy_table.lookup(category, sub_category) if kind == COVERED else None
+        for (category, sub_category), kind in zip(pairs, pair_kind)
+    ]
+
+    item_pair = unique_pair[desc_codes]
+    item_kind = pair_kind[item_pair]
+
+    # ----------------------------------
+    # 3. Category totals per receipt (grouped reduction)
+    # ----------------------------------
+    covered = np.flatnonzero(item_kind == COVERED)
+    item_group, group_keys = pd.factorize(item_receipt[covered] * len(pairs) + item_pair[covered])
+    n_groups = len(group_keys)
+    group_receipt = group_keys // len(pairs)
+    group_pair = group_keys % len(pairs)
+
+    amounts = [raw_amounts[i] for i in covered]
+    for amount in amounts:
+        if not isinstance(amount, (int, float)):
+            raise TypeError(
+                f"line item total_amount must be a number, got {type(amount).__name__}"
+            )
+
+    # bincount adds in item order, matching the running Python sum
+    group_total = np.bincount(item_group, weights=np.asarray(amounts, dtype=float), minlength=n_groups)
+    group_has_float = np.bincount(
+        item_group,
+        weights=np.fromiter((isinstance(a, float) for a in amounts), dtype=float, count=len(amounts)),
+        minlength=n_groups
+    ) > 0
+    group_last = np.full(n_groups, -1)
+    np.maximum.at(group_last, item_group, covered)
+
+    totals = [
+        float(t) if has_float else int(t)
+        for t, has_float in zip(group_total, group_has_float)
+    ]
+
+    # ----------------------------------
+    # 4. Limit inputs per group
+    # ----------------------------------
+    group_policy = [pair_policy[p] for p in group_pair]
+    group_limit = np.array([
+        np.nan if policy is None or policy["limit"] is None else policy["limit"]
+        for policy in group_policy
+    ], dtype=float)
+    group_checked = ~np.isnan(group_limit)
+    group_freq = [policy["limit_frequency"] if policy else None for policy in group_policy]
+
+    headers = {}
+    for r in np.unique(group_receipt):
+        header = receipts[r][1].get("header", {})
+        no_of_days = header.get("Number of days")
+        headers[r] = (
+            no_of_days,
+            normalize_buyer(header.get("Buyer Name")),
+            normalize_spend_date(header.get("Date")),
+            coverage_days(no_of_days)
+        )
+
+    # Value compared against the limit, before prior spend
+    group_value = group_total.copy()
+    for g in np.flatnonzero(group_checked):
+        if group_freq[g] != "daily":
+            continue
+        no_of_days = headers[group_receipt[g]][0]
+        if no_of_days == 1:
+            continue
+        # validate_receipt divides by it and fails with the same types
+        if not isinstance(no_of_days, (int, float)):
+            raise TypeError(
+                f"'Number of days' must be a number for daily limits, got {no_of_days!r}"
+            )
+        if no_of_days == 0:
+            raise ZeroDivisionError("'Number of days' is 0 on a receipt with daily limits")
+        group_value[g] = totals[g] / no_of_days
+
+    # ----------------------------------
+    # 5. Waves of receipts independent through the ledger
+    # ----------------------------------
+    group_bounds = np.searchsorted(group_receipt, np.arange(len(receipts) + 1))
+    item_bounds = np.searchsorted(item_receipt, np.arange(len(receipts) + 1))
+
+    if use_ledger:
+        reads, writes = [], []
+        for r in range(len(receipts)):
+            r_reads, r_writes = [], []
+            for g in range(group_bounds[r], group_bounds[r + 1]):
+                policy = group_policy[g]
+                if policy is None:
+                    continue
+                _, buyer, start, days = headers[r]
+                category = pairs[group_pair[g]][0]
+                if group_checked[g]:
+                    period = FREQUENCY_PERIOD.get(group_freq[g], "total")
+                    r_reads += _window_keys(buyer, category, policy["sub_category"], period, start, days)
+                dates = _dates(start, days)
+                key = (buyer, category, policy["sub_category"] or "")
+                r_writes += [key + ("day", d) for d in dates]
+                r_writes += [key + ("month", m) for m in {d[:7] for d in dates}]
+                r_writes.append(key + ("total", "all"))
+            reads.append(r_reads)
+            writes.append(r_writes)
+        receipt_wave = _schedule_waves(reads, writes)
+    else:
+        receipt_wave = np.zeros(len(receipts), dtype=int)
+
+    group_prior = np.zeros(n_groups)
+    priors = [0] * n_groups
+
+    def receipt_result(r, exceeded):
+        """Receipt r's result, shaped as validate_receipt builds it."""
+        approved_items = []
+        violations = []
+        uncovered_items = []
+
+        for i in range(item_bounds[r], item_bounds[r + 1]):
+            if item_kind[i] == UNCOVERED:
+                uncovered_items.append({
+                    "item": descs[i],
+                    "unit_price": unit_prices[i],
+                    "reason": "No matching company policy"
+                })
+            elif item_kind[i] == STATUTORY:
+                approved_items.append({
+                    "item": descs[i],
+                    "unit_price": unit_prices[i],
+                    "status": "Statutory tax"
+                })
+
+        for g in range(group_bounds[r], group_bounds[r + 1]):
+            category, sub_category = pairs[group_pair[g]]
+            policy = group_policy[g]
+            up = unit_prices[group_last[g]]
+
+            if not policy:
+                violations.append({
+                    "policy": category,
+                    "sub_category": sub_category,
+                    "limit": None,
+                    "unit_price": up,
+                    "actual": totals[g],
+                    "reason": "Policy not defined"
+                })
+            elif exceeded[g]:
+                violations.append({
+                    "policy": category,
+                    "sub_category": policy["sub_category"],
+                    "rule": policy["rule"],
+                    "limit": policy["limit"],
+                    "unit_price": up,
+                    "actual": totals[g],
+                    "prior_spend": priors[g],
+                    "reason": f"{category} expense exceeds allowed limit"
+                })
+            else:
+                approved_items.append({
+                    "category": category,
+                    "sub_category": policy["sub_category"],
+                    "total": totals[g],
+                    "unit_price": up,
+                    "status": "Within policy limits"
+                })
+
+        rejected = bool(violations or uncovered_items)
+        return {
+            "decision": "REJECTED" if rejected else "APPROVED",
+            "approved_items": approved_items,
+            "violations": violations,
+            "uncovered_items": uncovered_items,
+            "explanation": REJECTED_EXPLANATION if rejected else APPROVED_EXPLANATION
+        }
+
+    # Receipts with line items, by wave and then batch order
+    pending = np.array([r for r in range(len(receipts)) if results[r] is None])
+    pending = pending[np.argsort(receipt_wave[pending], kind="stable")]
+    wave_starts = np.flatnonzero(np.diff(receipt_wave[pending], prepend=-1))
+    waves = np.split(pending, wave_starts[1:])
+
+    if not headers:
+        # Nothing policy-covered: no limits to check, no ledger
+        # reads and no spend to record
+        for r in pending:
+            results[r] = receipt_result(r, None)
+        waves = []
+
+    with get_cursor() as cur:
+        if write and not cur.connection.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+
+        ledger = None
+        if use_ledger and headers:
+            ledger = _LedgerSnapshot(
+                cur,
+                {h[1] for h in headers.values()},
+                [receipts[r][0] for r in headers],
+                min(h[2] for h in headers.values()),
+                max(_dates(h[2], h[3])[-1] for h in headers.values())
+            )
+        rows_by_receipt = {}
+
+        for wave_receipts in waves:
+            wave_groups = np.concatenate([
+                np.arange(group_bounds[r], group_bounds[r + 1]) for r in wave_receipts
+            ]).astype(int)
+
+            # ----------------------------------
+            # 6. Prior spend, then vectorized limit check
+            # ----------------------------------
+            if ledger is not None:
+                for g in wave_groups[group_checked[wave_groups]]:
+                    _, buyer, start, days = headers[group_receipt[g]]
+                    priors[g] = ledger.prior(
+                        buyer,
+                        pairs[group_pair[g]][0],
+                        group_policy[g]["sub_category"],
+                        FREQUENCY_PERIOD.get(group_freq[g], "total"),
+                        start,
+                        days
+                    )
+                    group_prior[g] = priors[g]
+
+            exceeded = np.zeros(n_groups, dtype=bool)
+            exceeded[wave_groups] = group_checked[wave_groups] & (
+                group_value[wave_groups] + group_prior[wave_groups] > group_limit[wave_groups]
+            )
+
+            # ----------------------------------
+            # 7. Results and approved spend
+            # ----------------------------------
+            wave_entries = []
+            for r in wave_receipts:
+                results[r] = receipt_result(r, exceeded)
+                receipt_id, receipt_data = receipts[r]
+                wave_entries.append((receipt_id, receipt_data.get("header", {}), results[r]))
+
+            # Wave receipts are in batch order, as the triggers would see them
+            for r, entry in zip(wave_receipts, wave_entries):
+                rows_by_receipt[r] = spend_rows([entry])
+                if ledger is not None:
+                    ledger.apply(rows_by_receipt[r])
+
+        if write:
+            log_validations([
+                (receipt_id, results[r])
+                for r, (receipt_id, receipt_data) in enumerate(receipts)
+                if receipt_data.get("line_items")
+            ])
+            insert_spend_rows([row for r in sorted(rows_by_receipt) for row in rows_by_receipt[r]])
+
+    return results
@@ -1,22 +1,24 @@
-import sqlite3
 import os
-from contextlib import contextmanager
+from core.sqlite_pool import FETCH_BATCH_SIZE, get_pooled_connection, pooled_cursor
+from core.sqlite_pool import iter_rows as _iter_rows
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "finance_agents.db")
 
 def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    return get_pooled_connection(DB_PATH)["conn"]
 
-@contextmanager
 def get_cursor():
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        yield cur
-        conn.commit()
-    finally:
-        conn.close()
+    return pooled_cursor(DB_PATH)
+
+def iter_rows(sql, params=(), batch_size=FETCH_BATCH_SIZE):
+    return _iter_rows(DB_PATH, sql, params, batch_size)
+
+def ensure_column(cur, table, column, declaration):
+    """Adds a column to an existing table if it is missing."""
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cur.fetchall()}:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
 
 def init_db():
     with get_cursor() as cur:
@@ -38,6 +40,39 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """)
+
+        ensure_column(cur, "receipts", "number_of_days", "REAL")
+
+        # Newest-first listings stream in index order, no sort
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_receipts_created_at
+        ON receipts(created_at)
+        """)
+
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS receipt_line_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            receipt_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            description TEXT,
+            quantity REAL,
+            unit_price REAL,
+            total_amount REAL,
+            intent TEXT,
+            category TEXT,
+            sub_category TEXT
+        )
+        """)
+
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_receipt_line_items_receipt
+        ON receipt_line_items(receipt_id, line_no)
+        """)
+
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_receipt_line_items_category
+        ON receipt_line_items(category, sub_category)
+        """)
         
         cur.execute("""
         CREATE TABLE IF NOT EXISTS policies (
@@ -51,6 +86,19 @@ def init_db():
         )
         """)
 
+        # Bumped on every policy write; processes holding a
+        # compiled policy table reload when it moves
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS policy_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """)
+
+        cur.execute("""
+        INSERT OR IGNORE INTO policy_version (id, version) VALUES (1, 0)
+        """)
+
         cur.execute("""
         CREATE TABLE IF NOT EXISTS validation_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,37 +109,139 @@ def init_db():
         )
         """)
 
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_validation_logs_receipt
+        ON validation_logs(receipt_id)
+        """)
+
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_validation_logs_created_at
+        ON validation_logs(created_at)
+        """)
+
+        # -------------------------------------------------
+        # SPEND LEDGER
+        # -------------------------------------------------
+        # One row per approved receipt, policy and day it covers;
+        # the triggers keep per-buyer day / month / total rollups
+        # in step so limit checks are single-row lookups.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS spend_entries (
+            receipt_id INTEGER NOT NULL,
+            buyer TEXT NOT NULL,
+            category TEXT NOT NULL,
+            sub_category TEXT NOT NULL DEFAULT '',
+            spend_date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (receipt_id, category, sub_category, spend_date)
+        )
+        """)
+
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS spend_rollups (
+            buyer TEXT NOT NULL,
+            category TEXT NOT NULL,
+            sub_category TEXT NOT NULL,
+            period TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (buyer, category, sub_category, period, period_key)
+        ) WITHOUT ROWID
+        """)
+
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_spend_rollups_insert
+        AFTER INSERT ON spend_entries
+        BEGIN
+            INSERT INTO spend_rollups VALUES
+                (NEW.buyer, NEW.category, NEW.sub_category, 'day', NEW.spend_date, NEW.amount),
+                (NEW.buyer, NEW.category, NEW.sub_category, 'month', substr(NEW.spend_date, 1, 7), NEW.amount),
+                (NEW.buyer, NEW.category, NEW.sub_category, 'total', 'all', NEW.amount)
+            ON CONFLICT DO UPDATE SET amount = amount + excluded.amount;
+        END
+        """)
+
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_spend_rollups_delete
+        AFTER DELETE ON spend_entries
+        BEGIN
+            UPDATE spend_rollups
+            SET amount = amount - OLD.amount
+            WHERE buyer = OLD.buyer
+              AND category = OLD.category
+              AND sub_category = OLD.sub_category
+              AND (period, period_key) IN (
+                  VALUES ('day', OLD.spend_date),
+                         ('month', substr(OLD.spend_date, 1, 7)),
+                         ('total', 'all')
+              );
+        END
+        """)
+
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS document_cache (
+            content_sha256 TEXT NOT NULL,
+            llm_provider TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            raw_text TEXT,
+            parsed_json TEXT,
+            size_bytes INTEGER,
+            hit_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_sha256, llm_provider, prompt_version)
+        )
+        """)
+
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_document_cache_last_accessed
+        ON document_cache(last_accessed)
+        """)
+
 import json
-from core.db import get_cursor
+from core.db import FETCH_BATCH_SIZE, get_cursor, iter_rows
+
+ALL_RECEIPTS_SQL = """
+    SELECT
+        id,
+        vendor_name,
+        bill_type,
+        total_amount,
+        tax_amount,
+        created_at
+    FROM receipts
+    ORDER BY created_at DESC
+"""
+
+VALIDATION_LOGS_SQL = """
+    SELECT receipt_id, decision, details, created_at
+    FROM validation_logs
+    ORDER BY created_at DESC
+"""
+
+
+def _receipt_summary(r):
+    return {
+        "id": r[0],
+        "vendor_name": r[1],
+        "bill_type": r[2],
+        "total_amount": r[3],
+        "tax_amount": r[4],
+        "created_at": r[5],
+    }
 
 
 def fetch_all_receipts():
     with get_cursor() as cur:
-        cur.execute("""
-            SELECT
-                id,
-                vendor_name,
-                bill_type,
-                total_amount,
-                tax_amount,
-                created_at
-            FROM receipts
-            ORDER BY created_at DESC
-        """)
+        cur.execute(ALL_RECEIPTS_SQL)
         rows = cur.fetchall()
 
-    results = []
-    for r in rows:
-        results.append({
-            "id": r[0],
-            "vendor_name": r[1],
-            "bill_type": r[2],
-            "total_amount": r[3],
-            "tax_amount": r[4],
-            "created_at": r[5],
-        })
+    return [_receipt_summary(r) for r in rows]
 
-    return results
+
+def iter_all_receipts(batch_size=FETCH_BATCH_SIZE):
+    """Streaming fetch_all_receipts, batch_size rows per fetch."""
+    return map(_receipt_summary, iter_rows(ALL_RECEIPTS_SQL, batch_size=batch_size))
 
 def fetch_receipt_details(receipt_id: int):
     with get_cursor() as cur:
@@ -143,12 +293,26 @@ def fetch_policies():
         return cur.fetchall()
 
 
+def bump_policy_version(cur):
+    """Call in the same transaction as any write to policies."""
+    cur.execute("""
+        UPDATE policy_version SET version = version + 1 WHERE id = 1
+    """)
+
+
+def fetch_policy_version(cur) -> int:
+    cur.execute("SELECT version FROM policy_version WHERE id = 1")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
 def insert_policy(category, sub_category, rule, max_amount, conditions, limit_frequency):
     with get_cursor() as cur:
         cur.execute("""
             INSERT INTO policies (category, sub_category, rule, max_amount, conditions, limit_frequency)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (category, sub_category, rule, max_amount, conditions, limit_frequency))
+        bump_policy_version(cur)
 
 
 def delete_policy(policy_id: int):
@@ -157,13 +321,15 @@ def delete_policy(policy_id: int):
             DELETE FROM policies
             WHERE id = ?
         """, (policy_id,))
+        bump_policy_version(cur)
 
 
 def fetch_validation_logs():
     with get_cursor() as cur:
-        cur.execute("""
-            SELECT receipt_id, decision, details, created_at
-            FROM validation_logs
-            ORDER BY created_at DESC
-        """)
+        cur.execute(VALIDATION_LOGS_SQL)
         return cur.fetchall()
+
+
+def iter_validation_logs(batch_size=FETCH_BATCH_SIZE):
+    """Streaming fetch_validation_logs, batch_size rows per fetch."""
+    return iter_rows(VALIDATION_LOGS_SQL, batch_size=batch_size)
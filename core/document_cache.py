@@ -0,0 +1,166 @@
+import hashlib
+import json
+import threading
+from core.db import get_cursor
+
+# -------------------------------------------------
+# EVICTION LIMITS
+# -------------------------------------------------
+CACHE_MAX_ENTRIES = 5000
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_MAX_AGE_DAYS = 90
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "text_hits": 0, "misses": 0, "evicted": 0}
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_cached(content_sha256, llm_provider, prompt_version):
+    """
+    Full hit: extracted text and parsed receipt for this file,
+    provider and prompt version. Returns None on a miss.
+    """
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT raw_text, parsed_json
+            FROM document_cache
+            WHERE content_sha256 = ? AND llm_provider = ? AND prompt_version = ?
+        """, (content_sha256, llm_provider, prompt_version))
+        row = cur.fetchone()
+
+        if row:
+            cur.execute("""
+                UPDATE document_cache
+                SET hit_count = hit_count + 1,
+                    last_accessed = CURRENT_TIMESTAMP
+                WHERE content_sha256 = ? AND llm_provider = ? AND prompt_version = ?
+            """, (content_sha256, llm_provider, prompt_version))
+
+    if not row:
+        _count("misses")
+        return None
+
+    _count("hits")
+    return {"raw_text": row[0], "parsed": json.loads(row[1])}
+
+
+def get_cached_text(content_sha256):
+    """
+    Extracted text for a file seen under any provider / prompt,
+    so a new prompt version still skips PDF parsing.
+    """
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT raw_text FROM document_cache
+            WHERE content_sha256 = ?
+            LIMIT 1
+        """, (content_sha256,))
+        row = cur.fetchone()
+
+    if row:
+        _count("text_hits")
+        return row[0]
+    return None
+
+
+def put_cached(content_sha256, llm_provider, prompt_version, raw_text, parsed):
+    put_cached_many([(content_sha256, raw_text, parsed)], llm_provider, prompt_version)
+
+
+def put_cached_many(entries, llm_provider, prompt_version):
+    """
+    put_cached for [(content_sha256, raw_text, parsed)] with a single
+    eviction pass. Joins the caller's transaction when called inside
+    get_cursor().
+    """
+    rows = []
+    for content_sha256, raw_text, parsed in entries:
+        parsed_json = json.dumps(parsed)
+        size = len(raw_text or "") + len(parsed_json)
+        rows.append((content_sha256, llm_provider, prompt_version, raw_text, parsed_json, size))
+
+    if not rows:
+        return
+
+    with get_cursor() as cur:
+        cur.executemany("""
+            INSERT OR REPLACE INTO document_cache (
+                content_sha256, llm_provider, prompt_version,
+                raw_text, parsed_json, size_bytes
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+
+        evict()
+
+
+def evict(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+          max_age_days=CACHE_MAX_AGE_DAYS):
+    """
+    Drops entries not used for max_age_days, then least recently
+    used entries until both the entry and byte limits hold.
+    Returns the number of entries removed.
+    """
+    with get_cursor() as cur:
+        cur.execute("""
+            DELETE FROM document_cache
+            WHERE last_accessed < datetime('now', ?)
+        """, (f"-{max_age_days} days",))
+        removed = cur.rowcount
+
+        cur.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM document_cache")
+        entries, total_bytes = cur.fetchone()
+
+        if entries > max_entries or total_bytes > max_bytes:
+            cur.execute("""
+                SELECT rowid, size_bytes FROM document_cache
+                ORDER BY last_accessed
+            """)
+            victims = []
+            for rowid, size in cur.fetchall():
+                if entries <= max_entries and total_bytes <= max_bytes:
+                    break
+                victims.append((rowid,))
+                entries -= 1
+                total_bytes -= size or 0
+
+            cur.executemany("DELETE FROM document_cache WHERE rowid = ?", victims)
+            removed += len(victims)
+
+    if removed:
+        _count("evicted", removed)
+    return removed
+
+
+def cache_stats():
+    """In-process hit/miss counters plus current cache size."""
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(hit_count), 0)
+            FROM document_cache
+        """)
+        entries, total_bytes, lifetime_hits = cur.fetchone()
+
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats.update({
+        "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        "entries": entries,
+        "bytes": total_bytes,
+        "lifetime_hits": lifetime_hits
+    })
+    return stats
@@ -1,22 +1,21 @@
-import pdfplumber
-from docx import Document
+from core.pdf_extract import extract_pages
 
-def extract_text_from_pdf(file_path: str) -> str:
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
+def extract_text_from_pdf(file_path: str, workers=None) -> str:
+    return "".join(
+        page_text + "\n"
+        for page_text in extract_pages(file_path, "text", workers)
+        if page_text
+    )
 
 def extract_text_from_docx(file_path: str) -> str:
+    from docx import Document
+
     doc = Document(file_path)
     return "\n".join([p.text for p in doc.paragraphs])
 
-def extract_text(file_path: str) -> str:
+def extract_text(file_path: str, workers=None) -> str:
     if file_path.lower().endswith(".pdf"):
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(file_path, workers)
     elif file_path.lower().endswith(".docx"):
         return extract_text_from_docx(file_path)
     else:
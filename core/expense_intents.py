@@ -2,7 +2,8 @@
 # -------------------------------------------------
 # GENERIC, DOMAIN-AGNOSTIC EXPENSE INTENTS
 # -------------------------------------------------
-from typing import Optional
+import re
+from typing import List, Optional, Tuple
 
 INTENT_KEYWORDS = {
     "FOOD_CONSUMPTION": [
@@ -68,16 +69,164 @@ INTENT_TO_POLICY = {
 }
 
 
+# -------------------------------------------------
+# INTENT → POLICY SUB-CATEGORY (ALIGNS WITH DB)
+# -------------------------------------------------
+
+INTENT_TO_SUB_CATEGORY = {
+    "FOOD_CONSUMPTION": "Meals",
+    "LODGING": "Hotel",
+    "PERSONAL_SERVICE": "Laundry",
+    "CLOUD_COMPUTE": "Cloud",
+    "SOFTWARE_SUBSCRIPTION": "SaaS",
+    "BUSINESS_EVENT": "Events",
+    "STATUTORY_TAX": "Tax",
+    "TRAVEL": "Cab",
+}
+
+# Keywords that narrow their intent to a different sub-category
+KEYWORD_TO_SUB_CATEGORY = {
+    "driver": "Driver",
+}
+
+
+# -------------------------------------------------
+# COMPILED KEYWORD MATCHER
+# -------------------------------------------------
+# The description is split into words once and each word is looked
+# up in a keyword index, so matching is on whole words ("bar" no
+# longer fires on "barcode", nor "rice" on "price") and costs one
+# pass whatever the size of INTENT_KEYWORDS. Simple plural / verb
+# forms ("meals", "rooms", "booked") still match.
+KEYWORD_SUFFIXES = ("", "s", "es", "ed", "ing")
+
+_WORD = re.compile(r"[^\W_]+")
+
+_index = None
+_index_version = None
+
+# Bumped by invalidate_matcher(); the index is rebuilt on the next
+# match whenever it was built for an older version
+_keywords_version = 0
+
+
+def invalidate_matcher():
+    """
+    Marks the keyword index stale. Call after editing INTENT_KEYWORDS
+    in place (set_intent_keywords does it for you).
+    """
+    global _keywords_version
+    _keywords_version += 1
+
+
+def set_intent_keywords(intent: str, keywords: List[str]):
+    """Adds or replaces one intent's keywords and invalidates the index."""
+    INTENT_KEYWORDS[intent] = list(keywords)
+    invalidate_matcher()
+
+
+def rebuild_matcher():
+    """
+    Recompiles the keyword index from the current INTENT_KEYWORDS:
+    word form -> intent for single words, first word -> phrases for
+    multi-word keywords. An earlier intent keeps a shared keyword.
+    """
+    global _index, _index_version
+
+    words = {}
+    phrases = {}
+    for rank, (intent, keywords) in enumerate(INTENT_KEYWORDS.items()):
+        for keyword in keywords:
+            parts = _WORD.findall(keyword.lower())
+            if not parts:
+                continue
+            for suffix in KEYWORD_SUFFIXES:
+                form = (*parts[:-1], parts[-1] + suffix)
+                if len(form) == 1:
+                    words.setdefault(form[0], (rank, intent))
+                else:
+                    phrases.setdefault(form[0], []).append((form, rank, intent))
+
+    # Longest phrase first at any one starting word
+    for candidates in phrases.values():
+        candidates.sort(key=lambda c: (-len(c[0]), c[1]))
+
+    _index = (words, phrases, frozenset(phrases))
+    _index_version = _keywords_version
+    return _index
+
+
+def _get_index():
+    if _index_version != _keywords_version:
+        return rebuild_matcher()
+    return _index
+
+
+def _iter_hits(tokens, words, phrases):
+    """(token index, tokens consumed, rank, intent) for every hit."""
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        for form, rank, intent in phrases.get(token, ()):
+            if tuple(tokens[i:i + len(form)]) == form:
+                yield i, len(form), rank, intent
+                i += len(form)
+                break
+        else:
+            hit = words.get(token)
+            if hit is not None:
+                yield i, 1, hit[0], hit[1]
+            i += 1
+
+
+def match_intents(description: str) -> List[Tuple[str, int, int]]:
+    """
+    Every keyword hit in one pass, as (intent, start, end) character
+    offsets in text order. Hits do not overlap.
+    """
+    if not description:
+        return []
+
+    words, phrases, _ = _get_index()
+    spans = [(m.start(), m.end()) for m in _WORD.finditer(description)]
+    tokens = [description[start:end].lower() for start, end in spans]
+
+    return [
+        (intent, spans[i][0], spans[i + n - 1][1])
+        for i, n, _, intent in _iter_hits(tokens, words, phrases)
+    ]
+
+
 # def detect_intent(description: str) -> str | None:
 def detect_intent(description: str) -> Optional[str]:
+    """
+    The matched intent listed first in INTENT_KEYWORDS,
+    wherever it appears in the text.
+    """
     if not description:
         return None
 
-    desc = description.lower()
-    for intent, keywords in INTENT_KEYWORDS.items():
-        if any(k in desc for k in keywords):
-            return intent
-    return None
+    words, phrases, phrase_starts = _get_index()
+    tokens = _WORD.findall(description.lower())
+
+    if phrase_starts.isdisjoint(tokens):
+        hits = [words[t] for t in tokens if t in words]
+    else:
+        hits = [(rank, intent) for _, _, rank, intent in _iter_hits(tokens, words, phrases)]
+
+    return min(hits)[1] if hits else None
+
+
+def intent_to_sub_category(intent: Optional[str], description: str = "") -> Optional[str]:
+    if not intent:
+        return None
+
+    if description:
+        for word in _WORD.findall(description.lower()):
+            sub_category = KEYWORD_TO_SUB_CATEGORY.get(word)
+            if sub_category and word in INTENT_KEYWORDS.get(intent, ()):
+                return sub_category
+    return INTENT_TO_SUB_CATEGORY.get(intent)
 
 
 # def intent_to_policy(intent: str | None) -> str:
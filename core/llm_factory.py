@@ -1,16 +1,91 @@
+import threading
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
 
-def get_llm(provider="openai", temperature=0):
-    if provider == "openai":
-        return ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=temperature
-        )
-    elif provider == "groq":
-        return ChatGroq(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            temperature=temperature
+MODELS = {
+    "openai": "gpt-4o-mini",
+    "groq": "meta-llama/llama-4-scout-17b-16e-instruct",
+}
+
+PROVIDERS = {
+    "openai": ChatOpenAI,
+    "groq": ChatGroq,
+}
+
+# Keep-alive pool shared by every client of one provider
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+_lock = threading.Lock()
+_clients = {}
+_http_clients = {}
+_counters = {}
+
+
+class CallCounter(BaseCallbackHandler):
+    """Thread-safe count of LLM calls and errors for one client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+    def on_llm_error(self, error, **kwargs):
+        with self._lock:
+            self.errors += 1
+
+
+def _shared_http_clients(provider):
+    # Caller holds _lock
+    if provider not in _http_clients:
+        _http_clients[provider] = (
+            httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+            httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
         )
-    else:
+    return _http_clients[provider]
+
+
+def get_llm(provider="openai", temperature=0, model=None):
+    """
+    Process-wide client for (provider, model, temperature), built
+    once and reused across Streamlit sessions. Async calls must run
+    on core.async_runtime's loop, which owns the shared async pool.
+    """
+    if provider not in PROVIDERS:
         raise ValueError("Unsupported LLM provider")
+
+    key = (provider, model or MODELS[provider], temperature)
+
+    with _lock:
+        llm = _clients.get(key)
+        if llm is None:
+            http_client, http_async_client = _shared_http_clients(provider)
+            counter = _counters[key] = CallCounter()
+            llm = _clients[key] = PROVIDERS[provider](
+                model=key[1],
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                callbacks=[counter]
+            )
+        return llm
+
+
+def llm_call_stats():
+    """{(provider, model, temperature): {"calls", "errors"}} so far."""
+    with _lock:
+        return {
+            key: {"calls": c.calls, "errors": c.errors}
+            for key, c in _counters.items()
+        }
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from core.async_runtime import run_async
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# PER-PROVIDER LIMITS AND RETRY POLICY
+# -------------------------------------------------
+# (requests per second, burst)
+PROVIDER_RATE_LIMITS = {
+    "openai": (5.0, 10),
+    "groq": (0.5, 5),
+}
+DEFAULT_RATE_LIMIT = (1.0, 5)
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+DEFAULT_DEADLINE = 120.0
+
+HEDGE_PARTNER = {"openai": "groq", "groq": "openai"}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from threads and coroutines."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token and returns 0, or returns seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, deadline_at=None):
+        """
+        Blocks until a token is taken. Raises DeadlineExceeded as soon
+        as the next token would arrive after deadline_at (monotonic).
+        """
+        while (wait := self._take()) > 0:
+            if deadline_at is not None and time.monotonic() + wait > deadline_at:
+                raise DeadlineExceeded("rate limit wait exceeds the call deadline")
+            time.sleep(wait)
+
+
+def is_retryable(error) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+
+    name = type(error).__name__
+    return any(tag in name for tag in ("RateLimit", "Timeout", "APIConnection"))
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, error=None):
+    """Exponential backoff with full jitter, never below Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    retry_after = _retry_after(error) if error is not None else None
+    return max(delay, retry_after or 0)
+
+
+def _next_before(chunks, deadline_at):
+    """
+    next(chunks) on a daemon thread, abandoned with DeadlineExceeded
+    once deadline_at passes. A sync stream cannot be interrupted, so
+    a stalled reader is left to finish on its own.
+    """
+    outcome = {}
+
+    def read():
+        try:
+            outcome["chunk"] = next(chunks)
+        except BaseException as e:
+            outcome["error"] = e
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    reader.join(max(0, deadline_at - time.monotonic()))
+
+    if reader.is_alive():
+        raise DeadlineExceeded("no stream chunk before the call deadline")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["chunk"]
+
+
+class LLMScheduler:
+    """
+    Single gate for LLM calls: per-provider token-bucket rate
+    limiting, retries with jittered exponential backoff, per-call
+    deadlines and optional hedging across providers.
+
+    llm_factory(provider) returns a client with invoke / ainvoke /
+    stream; it defaults to core.llm_factory.get_llm and can be a
+    fake for tests.
+    """
+
+    def __init__(self, llm_factory=None, rate_limits=None):
+        if llm_factory is None:
+            from core.llm_factory import get_llm
+            llm_factory = get_llm
+        self.llm_factory = llm_factory
+        self.rate_limits = {**PROVIDER_RATE_LIMITS, **(rate_limits or {})}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, provider) -> TokenBucket:
+        with self._lock:
+            if provider not in self._buckets:
+                rate, burst = self.rate_limits.get(provider, DEFAULT_RATE_LIMIT)
+                self._buckets[provider] = TokenBucket(rate, burst)
+            return self._buckets[provider]
+
+    async def _ainvoke_with_retries(self, provider, messages, max_retries, deadline_at):
+        llm = self.llm_factory(provider)
+
+        for attempt in range(max_retries + 1):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{provider} call exceeded its deadline")
+
+            try:
+                await asyncio.wait_for(self.bucket(provider).acquire(), remaining)
+                remaining = deadline_at - time.monotonic()
+                return await asyncio.wait_for(llm.ainvoke(messages), remaining)
+            except asyncio.TimeoutError as e:
+                if deadline_at - time.monotonic() <= 0:
+                    raise DeadlineExceeded(f"{provider} call exceeded its deadline") from e
+                error = e
+            except Exception as e:
+                error = e
+
+            if attempt == max_retries or not is_retryable(error):
+                raise error
+
+            delay = backoff_delay(attempt, error)
+            logger.warning("%s call failed (%s), retry %s in %.1fs",
+                           provider, error, attempt + 1, delay)
+            await asyncio.sleep(min(delay, max(0, deadline_at - time.monotonic())))
+
+    async def ainvoke(self, provider, messages, max_retries=MAX_RETRIES,
+                      deadline=DEFAULT_DEADLINE, hedge=False):
+        """
+        Scheduled llm.ainvoke. With hedge=True the same request also
+        goes to HEDGE_PARTNER[provider]; the first success wins and
+        the other call is cancelled.
+        """
+        deadline_at = time.monotonic() + deadline
+
+        if not hedge:
+            return await self._ainvoke_with_retries(provider, messages, max_retries, deadline_at)
+
+        tasks = [
+            asyncio.ensure_future(self._ainvoke_with_retries(p, messages, max_retries, deadline_at))
+            for p in (provider, HEDGE_PARTNER[provider])
+        ]
+        try:
+            errors = []
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    return await finished
+                except Exception as e:
+                    errors.append(e)
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def invoke(self, provider, messages, **kwargs):
+        """Blocking ainvoke, run on the shared async loop."""
+        return run_async(self.ainvoke(provider, messages, **kwargs))
+
+    def stream(self, provider, messages, max_retries=MAX_RETRIES, deadline=DEFAULT_DEADLINE):
+        """
+        Scheduled llm.stream. Retries happen only until the first
+        chunk arrives; a stream that breaks midway is not replayed.
+        The deadline covers the rate-limit wait and the first chunk.
+        """
+        deadline_at = time.monotonic() + deadline
+        llm = self.llm_factory(provider)
+
+        for attempt in range(max_retries + 1):
+            try:
+                self.bucket(provider).acquire_sync(deadline_at)
+                chunks = iter(llm.stream(messages))
+                first = _next_before(chunks, deadline_at)
+                break
+            except StopIteration:
+                return
+            except DeadlineExceeded as e:
+                raise DeadlineExceeded(f"{provider} stream exceeded its deadline") from e
+            except Exception as e:
+                if (attempt == max_retries or not is_retryable(e)
+                        or time.monotonic() >= deadline_at):
+                    raise
+                delay = min(backoff_delay(attempt, e), max(0, deadline_at - time.monotonic()))
+                logger.warning("%s stream failed (%s), retry %s in %.1fs",
+                               provider, e, attempt + 1, delay)
+                time.sleep(delay)
+
+        yield first
+        yield from chunks
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LLMScheduler()
+        return _default
+
+
+def invoke_llm(provider, messages, **kwargs):
+    return get_scheduler().invoke(provider, messages, **kwargs)
+
+
+async def ainvoke_llm(provider, messages, **kwargs):
+    return await get_scheduler().ainvoke(provider, messages, **kwargs)
+
+
+def stream_llm(provider, messages, **kwargs):
+    return get_scheduler().stream(provider, messages, **kwargs)
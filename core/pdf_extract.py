@@ -0,0 +1,98 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes for page extraction (PDF_WORKERS env overrides)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+
+# Below this many pages per worker, process start-up costs more
+# than parallel extraction saves
+MIN_PAGES_PER_WORKER = 8
+
+# Pages per worker task, and pages extracted but not yet consumed.
+# Both are fixed, so memory does not grow with the document.
+RANGE_PAGES = 16
+WINDOW_PAGES = 256
+
+
+def _extract_page(page, mode):
+    if mode == "text":
+        return page.extract_text() or ""
+    if mode == "table":
+        return page.extract_table() or []
+    raise ValueError(f"Unsupported extraction mode: {mode}")
+
+
+def _iter_pages(file_path, mode):
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            result = _extract_page(page, mode)
+            page.close()
+            yield result
+
+
+def _extract_range(file_path, start, stop, mode):
+    import pdfplumber
+
+    results = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            results.append(_extract_page(page, mode))
+            page.close()
+    return results
+
+
+def page_count(file_path) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_page_ranges(file_path, mode="text", workers=None, window=WINDOW_PAGES):
+    """
+    Extracts pages and yields lists of per-page results in page
+    order: one page per list when extracting serially, otherwise
+    one RANGE_PAGES range per list from a process pool. At most
+    `window` pages are extracted ahead of the consumer, so memory
+    stays bounded on very large documents.
+    """
+    workers = max(1, workers or PDF_WORKERS)
+    total = page_count(file_path)
+
+    if workers == 1 or total < workers * MIN_PAGES_PER_WORKER:
+        for result in _iter_pages(file_path, mode):
+            yield [result]
+        return
+
+    ranges = iter([(s, min(s + RANGE_PAGES, total)) for s in range(0, total, RANGE_PAGES)])
+    in_flight = max(1, window // RANGE_PAGES)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit():
+            for start, stop in ranges:
+                pending.append(pool.submit(_extract_range, file_path, start, stop, mode))
+                return
+
+        try:
+            for _ in range(in_flight):
+                submit()
+            while pending:
+                chunk = pending.popleft().result()
+                submit()
+                yield chunk
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def extract_pages(file_path, mode="text", workers=None) -> list:
+    """Per-page extraction results for the whole document, in page order."""
+    pages = []
+    for chunk in iter_page_ranges(file_path, mode, workers):
+        pages.extend(chunk)
+    return pages
@@ -0,0 +1,84 @@
+import threading
+from core.db import fetch_policy_version, get_cursor
+
+# -------------------------------------------------
+# COMPILED POLICY DECISION TABLE
+# -------------------------------------------------
+# The policies table compiled into lookups keyed by
+# (category, sub_category). It is reloaded only when the
+# policy_version counter in the DB moves, so every process
+# sees insert_policy / delete_policy / load_policies writes
+# while validation itself never reads the policies table.
+
+_lock = threading.Lock()
+_table = None
+
+
+class PolicyTable:
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.by_key = {}
+        self.by_category = {}
+
+        # rows arrive in id order; the first row for a key wins
+        for category, sub_category, rule, max_amount, conditions, limit_freq in rows:
+            policy = {
+                "category": category,
+                "sub_category": sub_category or None,
+                "rule": rule,
+                "limit": max_amount,
+                "conditions": conditions,
+                "limit_frequency": limit_freq
+            }
+            self.by_key.setdefault((category, policy["sub_category"]), policy)
+            self.by_category.setdefault(category, []).append(policy)
+
+    def lookup(self, category, sub_category=None):
+        """
+        The exact (category, sub_category) policy, else a policy
+        covering the whole category (no sub_category), else the
+        category's only policy. None when nothing applies.
+        """
+        policy = self.by_key.get((category, sub_category))
+        if policy is None:
+            policy = self.by_key.get((category, None))
+        if policy is None:
+            candidates = self.by_category.get(category, [])
+            if len(candidates) == 1:
+                policy = candidates[0]
+        return policy
+
+    def __len__(self):
+        return sum(len(p) for p in self.by_category.values())
+
+
+def get_policy_table() -> PolicyTable:
+    """
+    The current decision table. Costs one single-row read of
+    policy_version unless the policies changed.
+    """
+    global _table
+
+    with get_cursor() as cur:
+        version = fetch_policy_version(cur)
+        if _table is not None and _table.version == version:
+            return _table
+
+        # Version and rows from one snapshot
+        if not cur.connection.in_transaction:
+            cur.execute("BEGIN")
+        version = fetch_policy_version(cur)
+        cur.execute("""
+            SELECT category, sub_category, rule, max_amount, conditions, limit_frequency
+            FROM policies
+            ORDER BY id
+        """)
+        table = PolicyTable(version, cur.fetchall())
+
+    # Any difference replaces the cache, not just a higher version:
+    # the counter can move back when the DB is restored or swapped
+    with _lock:
+        if _table is None or _table.version != table.version:
+            _table = table
+    return table
@@ -1,4 +1,4 @@
-from core.db import get_cursor
+from core.db import bump_policy_version, get_cursor
 from core.policies import POLICIES
 
 def load_policies():
@@ -9,3 +9,4 @@ def load_policies():
             INSERT INTO policies (category, sub_category, rule, max_amount, conditions, limit_frequency)
             VALUES (?, ?, ?, ?, ?, ?)
             """, p)
+        bump_policy_version(cur)
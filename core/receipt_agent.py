@@ -1,7 +1,10 @@
+import hashlib
 from langchain_core.prompts import PromptTemplate
-from core.llm_factory import get_llm
+from core.llm_scheduler import invoke_llm
 from core.db import get_cursor
+from core.document_cache import file_sha256, get_cached, get_cached_text, put_cached
 from core.document_parser import extract_text
+from core.expense_intents import detect_intent, intent_to_policy, intent_to_sub_category
 from core.json_utils import safe_json_loads
 
 PROMPT = """
@@ -94,54 +97,112 @@ Receipt Text:
 
 """
 
-def analyze_receipt(file_path, llm_provider):
-    raw_text = extract_text(file_path)
-    llm = get_llm(llm_provider)
+# Compiled once at import; cache entries are tied to the exact prompt text
+RECEIPT_PROMPT = PromptTemplate(
+    template=PROMPT,
+    input_variables=["receipt_text"]
+)
+PROMPT_VERSION = hashlib.sha256(PROMPT.encode()).hexdigest()[:12]
+
+INSERT_RECEIPT_SQL = """
+INSERT INTO receipts (
+    gst_number, receipt_number, document_type, receipt_date,
+    vendor_name, buyer_name, vendor_address, bill_type,
+    total_amount, tax_amount, raw_text, number_of_days
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_LINE_ITEM_SQL = """
+INSERT INTO receipt_line_items (
+    receipt_id, line_no, description, quantity, unit_price,
+    total_amount, intent, category, sub_category
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 
-    prompt = PromptTemplate(
-        template=PROMPT,
-        input_variables=["receipt_text"]
+def receipt_params(header: dict, raw_text: str):
+    return (
+        header.get("GST Number"),
+        header.get("Receipt Number"),
+        header.get("Document Type"),
+        header.get("Date"),
+        header.get("Vendor Name"),
+        header.get("Buyer Name"),
+        header.get("Vendor Address"),
+        header.get("Bill Type"),
+        header.get("Total Amount"),
+        header.get("Tax Amount"),
+        raw_text,
+        header.get("Number of days")
     )
 
-    response = llm.invoke(prompt.format(receipt_text=raw_text))
 
+def line_item_params(receipt_id: int, line_items: list):
+    """receipt_line_items rows, tagged with the policy category detected at ingestion."""
+    rows = []
+    for line_no, item in enumerate(line_items):
+        description = item.get("description")
+        intent = detect_intent((description or "").lower())
+        rows.append((
+            receipt_id,
+            line_no,
+            description,
+            item.get("quantity"),
+            item.get("unit_price"),
+            item.get("total_amount"),
+            intent,
+            intent_to_policy(intent),
+            intent_to_sub_category(intent, (description or "").lower())
+        ))
+    return rows
+
+
+def parse_receipt_response(content: str):
+    """
+    Parsed LLM output and whether it is cacheable. Unparseable
+    output is kept alongside the error, but never cached.
+    """
     try:
-        parsed = safe_json_loads(response.content)
+        return safe_json_loads(content), True
     except Exception as e:
-        parsed = {
+        return {
             "header": {},
             "line_items": [],
             "error": str(e),
-            "raw_llm_output": response.content
-        }
+            "raw_llm_output": content
+        }, False
+
+
+def analyze_receipt(file_path, llm_provider):
+    content_sha256 = file_sha256(file_path)
+    cached = get_cached(content_sha256, llm_provider, PROMPT_VERSION)
+
+    if cached:
+        raw_text = cached["raw_text"]
+        parsed = cached["parsed"]
+    else:
+        raw_text = get_cached_text(content_sha256)
+        if raw_text is None:
+            raw_text = extract_text(file_path)
+
+        response = invoke_llm(llm_provider, RECEIPT_PROMPT.format(receipt_text=raw_text))
+
+        parsed, ok = parse_receipt_response(response.content)
+        if ok:
+            put_cached(content_sha256, llm_provider, PROMPT_VERSION, raw_text, parsed)
 
     header = parsed.get("header", {})
     line_items = parsed.get("line_items", [])
 
     with get_cursor() as cur:
-        cur.execute("""
-        INSERT INTO receipts (
-            gst_number, receipt_number, document_type, receipt_date,
-            vendor_name, buyer_name, vendor_address, bill_type,
-            total_amount, tax_amount, raw_text
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            header.get("GST Number"),
-            header.get("Receipt Number"),
-            header.get("Document Type"),
-            header.get("Date"),
-            header.get("Vendor Name"),
-            header.get("Buyer Name"),
-            header.get("Vendor Address"),
-            header.get("Bill Type"),
-            header.get("Total Amount"),
-            header.get("Tax Amount"),
-            raw_text
-        ))
+        cur.execute(INSERT_RECEIPT_SQL, receipt_params(header, raw_text))
 
         receipt_id = cur.lastrowid
 
+        cur.executemany(INSERT_LINE_ITEM_SQL, line_item_params(receipt_id, line_items))
+
     return {
         "receipt_id": receipt_id,
         "receipt_data": {
@@ -0,0 +1,148 @@
+import time
+from core.batch_validation import validate_receipts_batch
+from core.db import get_cursor
+from core.policy_cache import get_policy_table
+
+REVALIDATION_BATCH_SIZE = 2000
+
+
+def _receipt_range(cur, start_id, end_id):
+    cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM receipts")
+    first, last = cur.fetchone()
+    return (
+        first if start_id is None else start_id,
+        last if end_id is None else end_id
+    )
+
+
+def load_receipt_data(cur, first_id, last_id) -> dict:
+    """
+    {receipt_id: receipt_data} rebuilt from receipts and
+    receipt_line_items, in the shape analyze_receipt returns.
+    Receipts stored before line items were kept have none.
+    """
+    cur.execute("""
+        SELECT id, receipt_date, buyer_name, number_of_days
+        FROM receipts
+        WHERE id BETWEEN ? AND ?
+        ORDER BY id
+    """, (first_id, last_id))
+    receipts = {
+        receipt_id: {
+            "header": {
+                "Date": receipt_date,
+                "Buyer Name": buyer_name,
+                "Number of days": number_of_days
+            },
+            "line_items": []
+        }
+        for receipt_id, receipt_date, buyer_name, number_of_days in cur.fetchall()
+    }
+
+    cur.execute("""
+        SELECT receipt_id, description, quantity, unit_price, total_amount
+        FROM receipt_line_items
+        WHERE receipt_id BETWEEN ? AND ?
+        ORDER BY receipt_id, line_no
+    """, (first_id, last_id))
+    for receipt_id, description, quantity, unit_price, total_amount in cur.fetchall():
+        receipt = receipts.get(receipt_id)
+        if receipt is not None:
+            receipt["line_items"].append({
+                "description": description,
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "total_amount": total_amount
+            })
+
+    return receipts
+
+
+def _latest_decisions(cur, first_id, last_id) -> dict:
+    cur.execute("""
+        SELECT receipt_id, decision
+        FROM validation_logs
+        WHERE id IN (
+            SELECT MAX(id) FROM validation_logs
+            WHERE receipt_id BETWEEN ? AND ?
+            GROUP BY receipt_id
+        )
+    """, (first_id, last_id))
+    return dict(cur.fetchall())
+
+
+def revalidate_receipts(start_id=None, end_id=None, dry_run=False,
+                        batch_size=REVALIDATION_BATCH_SIZE) -> dict:
+    """
+    Replays policy checks over stored line items for receipts
+    start_id..end_id (inclusive, default all) without any LLM call.
+
+    Ledger spend for the range is cleared and re-recorded in id
+    order, and a new validation log is written per receipt. With
+    dry_run, everything is rolled back and only the report is
+    returned. Replaying a sub-range keeps the ledger spend of
+    receipts outside it.
+    """
+    started = time.perf_counter()
+    policy_table = get_policy_table()
+    report = {"receipts": 0, "skipped": 0, "approved": 0, "rejected": 0, "changed": []}
+
+    with get_cursor() as cur:
+        if not cur.connection.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SAVEPOINT revalidate")
+
+        first_id, last_id = _receipt_range(cur, start_id, end_id)
+        cur.execute(
+            "DELETE FROM spend_entries WHERE receipt_id BETWEEN ? AND ?",
+            (first_id, last_id)
+        )
+
+        for lo in range(first_id, last_id + 1, batch_size):
+            hi = min(lo + batch_size - 1, last_id)
+            receipts = load_receipt_data(cur, lo, hi)
+            before = _latest_decisions(cur, lo, hi)
+
+            stored = [
+                (receipt_id, receipt_data)
+                for receipt_id, receipt_data in receipts.items()
+                if receipt_data["line_items"]
+            ]
+            report["skipped"] += len(receipts) - len(stored)
+
+            results = validate_receipts_batch(stored, policy_table)
+
+            for (receipt_id, _), result in zip(stored, results):
+                decision = result["decision"]
+                report["receipts"] += 1
+                report["approved" if decision == "APPROVED" else "rejected"] += 1
+                if before.get(receipt_id) != decision:
+                    report["changed"].append({
+                        "receipt_id": receipt_id,
+                        "before": before.get(receipt_id),
+                        "after": decision
+                    })
+
+        if dry_run:
+            cur.execute("ROLLBACK TO revalidate")
+        cur.execute("RELEASE revalidate")
+
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    start = int(args[0]) if len(args) > 0 else None
+    end = int(args[1]) if len(args) > 1 else None
+
+    report = revalidate_receipts(start, end, dry_run="--dry-run" in sys.argv)
+    for change in report["changed"]:
+        print(f"Receipt {change['receipt_id']}: {change['before']} -> {change['after']}")
+    print(
+        f"{report['receipts']} receipts revalidated in {report['elapsed_seconds']}s "
+        f"({report['approved']} approved, {report['rejected']} rejected, "
+        f"{len(report['changed'])} changed, {report['skipped']} without stored items)."
+    )
@@ -0,0 +1,213 @@
+import json
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from core.db import get_cursor
+
+# -------------------------------------------------
+# LIMIT FREQUENCY → LEDGER PERIOD
+# -------------------------------------------------
+FREQUENCY_PERIOD = {
+    "daily": "day",
+    "monthly": "month",
+    "total": "total",
+}
+
+# Date layouts the receipt LLM has been seen to return
+RECEIPT_DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d",
+    "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y",
+    "%d-%m-%y", "%d/%m/%y",
+    "%d %b %Y", "%d %B %Y", "%d-%b-%Y", "%d %b, %Y", "%d %B, %Y",
+    "%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y",
+)
+
+
+def normalize_buyer(name) -> str:
+    return " ".join(str(name or "").split()).lower()
+
+
+@lru_cache(maxsize=8192)
+def _parse_date(text):
+    try:
+        return date.fromisoformat(text[:10]).isoformat()
+    except ValueError:
+        pass
+
+    for candidate in (text, text.split("T")[0], text.split(" ")[0]):
+        for fmt in RECEIPT_DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, fmt).date().isoformat()
+            except ValueError:
+                continue
+    return None
+
+
+def normalize_spend_date(value, fallback=None) -> str:
+    """
+    ISO date for a receipt date string; fallback (or today)
+    when it cannot be read.
+    """
+    parsed = _parse_date(str(value or "").strip())
+    if parsed:
+        return parsed
+
+    if fallback:
+        return normalize_spend_date(fallback)
+    return date.today().isoformat()
+
+
+def coverage_days(no_of_days) -> int:
+    try:
+        days = int(float(no_of_days))
+    except (TypeError, ValueError):
+        return 1
+    return max(days, 1)
+
+
+def _spread(amount, start, days):
+    """amount split evenly over days from start; the last day takes the rounding."""
+    share = round(amount / days, 2)
+    first = date.fromisoformat(start)
+    for d in range(days):
+        day_amount = share if d < days - 1 else round(amount - share * (days - 1), 2)
+        yield (first + timedelta(days=d)).isoformat(), day_amount
+
+
+def fetch_period_spend(buyer, category, sub_category, frequency, spend_date, days=1) -> float:
+    """
+    Recorded spend for the limit window containing spend_date.
+    For daily limits over several days, the busiest day in the
+    range. One primary-key lookup (or range) on spend_rollups.
+    """
+    period = FREQUENCY_PERIOD.get(frequency, "total")
+    key = (normalize_buyer(buyer), category, sub_category or "")
+
+    with get_cursor() as cur:
+        if period == "day":
+            last = (date.fromisoformat(spend_date) + timedelta(days=days - 1)).isoformat()
+            cur.execute("""
+                SELECT MAX(amount) FROM spend_rollups
+                WHERE buyer = ? AND category = ? AND sub_category = ?
+                  AND period = 'day' AND period_key BETWEEN ? AND ?
+            """, (*key, spend_date, last))
+        else:
+            cur.execute("""
+                SELECT amount FROM spend_rollups
+                WHERE buyer = ? AND category = ? AND sub_category = ?
+                  AND period = ? AND period_key = ?
+            """, (*key, period, spend_date[:7] if period == "month" else "all"))
+        row = cur.fetchone()
+
+    return (row[0] or 0) if row else 0
+
+
+def approved_spend(result: dict) -> dict:
+    """{(category, sub_category): total} for an APPROVED validation."""
+    if result.get("decision") != "APPROVED":
+        return {}
+    return {
+        (item["category"], item.get("sub_category") or ""): item["total"]
+        for item in result.get("approved_items", [])
+        if "category" in item
+    }
+
+
+def spend_rows(entries) -> list:
+    """
+    spend_entries rows for [(receipt_id, header, validation result)],
+    in insert order; rejected receipts produce none.
+    """
+    rows = []
+    for receipt_id, header, result in entries:
+        totals = approved_spend(result)
+        if not totals:
+            continue
+
+        buyer = normalize_buyer(header.get("Buyer Name"))
+        start = normalize_spend_date(header.get("Date"))
+        days = coverage_days(header.get("Number of days"))
+
+        for (category, sub_category), total in totals.items():
+            for spend_date, amount in _spread(float(total or 0), start, days):
+                rows.append((receipt_id, buyer, category, sub_category, spend_date, amount))
+    return rows
+
+
+def record_spend(entries):
+    """
+    Adds approved receipts to the ledger. entries is
+    [(receipt_id, header, validation result)]; rejected receipts
+    are skipped and re-recording a receipt is a no-op.
+    """
+    insert_spend_rows(spend_rows(entries))
+
+
+def insert_spend_rows(rows):
+    if rows:
+        with get_cursor() as cur:
+            cur.executemany("""
+                INSERT OR IGNORE INTO spend_entries
+                    (receipt_id, buyer, category, sub_category, spend_date, amount)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+
+def remove_spend(receipt_id):
+    with get_cursor() as cur:
+        cur.execute("DELETE FROM spend_entries WHERE receipt_id = ?", (receipt_id,))
+
+
+def backfill_spend_ledger() -> int:
+    """
+    Rebuilds the ledger from receipts and their latest validation
+    log. Logs written before sub-categories existed are attributed
+    to the category's only (or category-wide) policy.
+    """
+    from core.policy_cache import get_policy_table
+
+    policy_table = get_policy_table()
+
+    with get_cursor() as cur:
+        if not cur.connection.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+
+        cur.execute("DELETE FROM spend_entries")
+        cur.execute("DELETE FROM spend_rollups")
+
+        cur.execute("""
+            SELECT r.id, r.buyer_name, r.receipt_date, r.created_at, v.details
+            FROM receipts r
+            JOIN (
+                SELECT receipt_id, MAX(id) AS id
+                FROM validation_logs
+                GROUP BY receipt_id
+            ) latest ON latest.receipt_id = r.id
+            JOIN validation_logs v ON v.id = latest.id
+            WHERE v.decision = 'APPROVED'
+        """)
+
+        entries = []
+        for receipt_id, buyer, receipt_date, created_at, details in cur.fetchall():
+            result = json.loads(details)
+            for item in result.get("approved_items", []):
+                if "category" in item and "sub_category" not in item:
+                    policy = policy_table.lookup(item["category"])
+                    item["sub_category"] = policy["sub_category"] if policy else None
+
+            header = {
+                "Buyer Name": buyer,
+                "Date": normalize_spend_date(receipt_date, fallback=created_at),
+            }
+            entries.append((receipt_id, header, result))
+
+        record_spend(entries)
+
+    return len(entries)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["backfill"]:
+        raise SystemExit("usage: python -m core.spend_ledger backfill")
+    print(f"Backfilled spend for {backfill_spend_ledger()} approved receipts.")
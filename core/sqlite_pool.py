@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# -------------------------------------------------
+# PER-CONNECTION PRAGMAS
+# -------------------------------------------------
+# WAL lets Streamlit sessions read while another writes,
+# NORMAL sync is durable under WAL, cache/mmap keep hot
+# pages in memory across calls.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",       # 64 MB page cache
+    "PRAGMA mmap_size=268435456",     # 256 MB memory map
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Streaming reads touch each page once: no memory map and a small
+# page cache keep their footprint flat however large the scan
+STREAM_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA mmap_size=0",
+    "PRAGMA cache_size=-4096",        # 4 MB page cache
+)
+
+# Rows per fetchmany() round trip for streaming reads
+FETCH_BATCH_SIZE = 1000
+
+_local = threading.local()
+
+
+def _open(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if getattr(_local, "query_counter", None) is not None:
+        conn.set_trace_callback(_count_query)
+    return conn
+
+
+def get_pooled_connection(db_path):
+    """
+    Returns the calling thread's persistent connection for db_path,
+    opening and tuning it on first use.
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    entry = conns.get(db_path)
+    if entry is None:
+        entry = conns[db_path] = {"conn": _open(db_path), "depth": 0}
+    return entry
+
+
+@contextmanager
+def pooled_cursor(db_path):
+    """
+    Same contract as the old get_cursor(): commit on success,
+    discard on error. Nested use on one thread shares the outer
+    transaction; only the outermost block commits or rolls back.
+    """
+    entry = get_pooled_connection(db_path)
+    conn = entry["conn"]
+    cur = conn.cursor()
+    entry["depth"] += 1
+    try:
+        yield cur
+        if entry["depth"] == 1:
+            conn.commit()
+    except BaseException:
+        if entry["depth"] == 1:
+            conn.rollback()
+        raise
+    finally:
+        entry["depth"] -= 1
+        cur.close()
+
+
+def iter_batches(db_path, sql, params=(), batch_size=FETCH_BATCH_SIZE):
+    """
+    Yields the result of one SELECT as fetchmany(batch_size) lists,
+    so memory stays bounded by one batch. The query runs on its own
+    query-only connection, held open (on one consistent snapshot)
+    until the generator is exhausted or closed; it does not see
+    uncommitted writes of this thread's pooled connection.
+    """
+    conn = _open(db_path)
+    try:
+        for pragma in STREAM_PRAGMAS:
+            conn.execute(pragma)
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        conn.close()
+
+
+def iter_rows(db_path, sql, params=(), batch_size=FETCH_BATCH_SIZE):
+    """iter_batches flattened to one row at a time."""
+    for rows in iter_batches(db_path, sql, params, batch_size):
+        yield from rows
+
+
+def _count_query(statement):
+    counter = getattr(_local, "query_counter", None)
+    if counter is not None:
+        counter["queries"] += 1
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts SQL statements (trigger bodies included) run on this
+    thread's pooled connections inside the block:
+
+        with count_queries() as counter:
+            ...
+        counter["queries"]
+    """
+    counter = {"queries": 0}
+    previous = getattr(_local, "query_counter", None)
+    _local.query_counter = counter
+
+    conns = getattr(_local, "conns", {})
+    for entry in conns.values():
+        entry["conn"].set_trace_callback(_count_query)
+    try:
+        yield counter
+    finally:
+        _local.query_counter = previous
+        if previous is None:
+            for entry in getattr(_local, "conns", {}).values():
+                entry["conn"].set_trace_callback(None)
+        else:
+            previous["queries"] += counter["queries"]
+
+
+def close_thread_connections():
+    """Closes every pooled connection owned by the calling thread."""
+    conns = getattr(_local, "conns", {})
+    for entry in conns.values():
+        entry["conn"].close()
+    conns.clear()
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+
+from core.db import BASE_DIR, get_cursor, init_db
+
+# -------------------------------------------------
+# ONE-TIME PROCESS START-UP
+# -------------------------------------------------
+# Streamlit re-executes app.py on every widget interaction, so
+# schema setup and policy seeding live here and run once per
+# process. The DB remembers which version of each schema it was
+# last set up for, so a warm process start skips the DDL entirely.
+#
+# Schemas outside core (e.g. dispute.db.DISPUTE_SCHEMA) are passed
+# in by their entry points as (name, version, setup): version() is
+# the string to store, setup() creates or upgrades the tables.
+
+# Bump whenever init_db gains DDL
+STARTUP_VERSION = 2
+
+# "False" means reload policies from core.policies on start-up
+POLICY_STATE_FILE = os.path.join(BASE_DIR, "load_policy_state.txt")
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_started = set()
+
+
+def _setup_core():
+    from core.policy_loader import load_policies
+
+    init_db()
+    with get_cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM policies)")
+        if not cur.fetchone()[0]:
+            load_policies()
+
+
+CORE_SCHEMA = ("core", lambda: str(STARTUP_VERSION), _setup_core)
+
+
+def _stored_versions(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS startup_versions (
+        name TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cur.execute("SELECT name, version FROM startup_versions")
+    return dict(cur.fetchall())
+
+
+def _policy_reload_requested():
+    try:
+        with open(POLICY_STATE_FILE, "r") as f:
+            return f.read().strip() == "False"
+    except FileNotFoundError:
+        return False
+
+
+def _run_startup(schemas):
+    with get_cursor() as cur:
+        stored = _stored_versions(cur)
+
+    for name, version, setup in schemas:
+        target = version()
+        if stored.get(name) != target:
+            logger.info("Setting up %s schema (%s -> %s)", name, stored.get(name), target)
+            setup()
+            with get_cursor() as cur:
+                cur.execute("""
+                    INSERT OR REPLACE INTO startup_versions (name, version)
+                    VALUES (?, ?)
+                """, (name, target))
+
+    if any(name == "core" for name, _, _ in schemas) and _policy_reload_requested():
+        from core.policy_loader import load_policies
+        load_policies()
+
+
+def ensure_started(*schemas):
+    """
+    Creates or upgrades the core schema and any extra `schemas`,
+    seeds policies into an empty policies table and honours
+    load_policy_state.txt — once per process and schema. Later
+    calls return immediately.
+    """
+    schemas = (CORE_SCHEMA, *schemas)
+    if all(name in _started for name, _, _ in schemas):
+        return
+
+    with _lock:
+        pending = [s for s in schemas if s[0] not in _started]
+        if pending:
+            _run_startup(pending)
+            _started.update(name for name, _, _ in pending)
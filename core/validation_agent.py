@@ -1,6 +1,8 @@
 import json
 from core.db import get_cursor
-from core.expense_intents import detect_intent, intent_to_policy
+from core.expense_intents import detect_intent, intent_to_policy, intent_to_sub_category
+from core.policy_cache import get_policy_table
+from core.spend_ledger import coverage_days, fetch_period_spend, normalize_spend_date, record_spend
 
 
 def resolve_unit_price(item):
@@ -30,6 +32,24 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
     """
     GENERIC, INTENT-DRIVEN, POLICY-CLOSED VALIDATION
     """
+    result = evaluate_receipt(receipt_data)
+
+    # Receipts without line items were never audited
+    if receipt_data.get("line_items"):
+        with get_cursor():
+            log_validations([(receipt_id, result)])
+            record_spend([(receipt_id, receipt_data.get("header", {}), result)])
+
+    return result
+
+
+def evaluate_receipt(receipt_data: dict, policy_table=None, use_ledger=True) -> dict:
+    """
+    validate_receipt without the audit log or ledger write. Pass a
+    policy_table to evaluate many receipts against one version
+    check. Limits include the buyer's recorded spend for the
+    policy window unless use_ledger is False.
+    """
 
     line_items = receipt_data.get("line_items", [])
     header = receipt_data.get("header", {})
@@ -52,25 +72,11 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
     # -------------------------------------------------
     # LOAD POLICIES
     # -------------------------------------------------
-    with get_cursor() as cur:
-        cur.execute("""
-            SELECT category, rule, max_amount, conditions, limit_frequency
-            FROM policies
-        """)
-        policies = cur.fetchall()
-
-    policy_map = {
-        category: {
-            "rule": rule,
-            "limit": max_amount,
-            "conditions": conditions,
-            "limit_frequency": limit_freq
-        }
-        for category, rule, max_amount, conditions, limit_freq in policies
-    }
+    if policy_table is None:
+        policy_table = get_policy_table()
 
     # -------------------------------------------------
-    # AGGREGATE BY POLICY CATEGORY (GENERIC)
+    # AGGREGATE BY POLICY (CATEGORY, SUB-CATEGORY)
     # -------------------------------------------------
     category_totals = {}
 
@@ -98,20 +104,22 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
             })
             continue
 
-        category_totals[policy_category] = (
-            category_totals.get(policy_category, (0, 0, 0))[0] + amount ,  resolve_unit_price(item) ,  item.get("quantity", 1)
+        policy_key = (policy_category, intent_to_sub_category(intent, desc))
+        category_totals[policy_key] = (
+            category_totals.get(policy_key, (0, 0, 0))[0] + amount ,  resolve_unit_price(item) ,  item.get("quantity", 1)
         )
 
     # -------------------------------------------------
     # VALIDATE CATEGORY TOTALS AGAINST POLICY
     # -------------------------------------------------
-    for category, value_tuple in category_totals.items():
+    for (category, sub_category), value_tuple in category_totals.items():
         total, up, qty = value_tuple
-        policy = policy_map.get(category)
+        policy = policy_table.lookup(category, sub_category)
 
         if not policy:
             violations.append({
                 "policy": category,
+                "sub_category": sub_category,
                 "limit": None,
                 "unit_price": up,
                 "actual": total,
@@ -122,20 +130,32 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
         limit = policy["limit"]
         limit_frequency=policy["limit_frequency"]
 
+        # Spend already recorded for this buyer in the policy window
+        prior = 0
+        if use_ledger and limit is not None:
+            prior = fetch_period_spend(
+                header.get("Buyer Name"),
+                category,
+                policy["sub_category"],
+                limit_frequency,
+                normalize_spend_date(header.get("Date")),
+                coverage_days(no_of_days)
+            )
+
         def limit_freq_check(limit_frequency,total,up,qty,limit):
             flag=False
             if limit_frequency=="daily":
                 if no_of_days==1:
-                    if total>limit:
+                    if total+prior>limit:
                         flag=False
                     else:
                         flag=True
-                elif (total/no_of_days)> limit:
+                elif (total/no_of_days)+prior> limit:
                     flag=False
                 else:
                     flag=True
             else:
-                if total>limit:
+                if total+prior>limit:
                     flag=False
                 else:
                     flag=True
@@ -144,15 +164,18 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
         if limit is not None and not limit_freq_check(limit_frequency,total,up,qty,limit):
             violations.append({
                 "policy": category,
+                "sub_category": policy["sub_category"],
                 "rule": policy["rule"],
                 "limit": limit,
                 "unit_price": up,
                 "actual": total,
+                "prior_spend": prior,
                 "reason": f"{category} expense exceeds allowed limit"
             })
         else:
             approved_items.append({
                 "category": category,
+                "sub_category": policy["sub_category"],
                 "total": total,
                 "unit_price": up,
                 "status": "Within policy limits"
@@ -171,7 +194,7 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
         decision = "APPROVED"
         explanation = "All receipt expenses comply with company policies."
 
-    result = {
+    return {
         "decision": decision,
         "approved_items": approved_items,
         "violations": violations,
@@ -179,17 +202,17 @@ def validate_receipt(receipt_id: int, receipt_data: dict) -> dict:
         "explanation": explanation
     }
 
-    # -------------------------------------------------
-    # AUDIT LOG
-    # -------------------------------------------------
+
+def log_validations(entries):
+    """
+    AUDIT LOG: one validation_logs row per (receipt_id, result),
+    written with a single executemany.
+    """
     with get_cursor() as cur:
-        cur.execute("""
+        cur.executemany("""
             INSERT INTO validation_logs (receipt_id, decision, details)
             VALUES (?, ?, ?)
-        """, (
-            receipt_id,
-            decision,
-            json.dumps(result)
-        ))
-
-    return result
+        """, [
+            (receipt_id, result["decision"], json.dumps(result))
+            for receipt_id, result in entries
+        ])
@@ -0,0 +1,118 @@
+from dispute.db import get_cursor
+
+BALANCE_FIELDS = [
+    "paid",
+    "bank_charges",
+    "tax_deducted",
+    "gateway_fee",
+    "forex_charges",
+    "transaction_count",
+    "last_payment_date"
+]
+
+BALANCES_FROM_TRANSACTIONS = """
+    SELECT linked_invoice_id,
+           SUM(amount),
+           SUM(COALESCE(bank_charges, 0)),
+           SUM(COALESCE(tax_deducted, 0)),
+           SUM(COALESCE(gateway_fee, 0)),
+           SUM(COALESCE(forex_charges, 0)),
+           COUNT(*),
+           MAX(transaction_date)
+    FROM transactions
+    GROUP BY linked_invoice_id
+"""
+
+
+def fetch_invoice_balance(invoice_number):
+    """
+    O(1) lookup of the materialized balance for one invoice.
+    Invoices without transactions have no row and report zeros.
+    """
+    with get_cursor() as cur:
+        cur.execute(f"""
+            SELECT {", ".join(BALANCE_FIELDS)}
+            FROM invoice_balances
+            WHERE invoice_number = ?
+        """, (invoice_number,))
+        row = cur.fetchone()
+
+    if not row:
+        return {
+            "paid": 0,
+            "bank_charges": 0,
+            "tax_deducted": 0,
+            "gateway_fee": 0,
+            "forex_charges": 0,
+            "transaction_count": 0,
+            "last_payment_date": None
+        }
+
+    return dict(zip(BALANCE_FIELDS, row))
+
+
+def rebuild_invoice_balances():
+    """
+    Recomputes invoice_balances from the transactions table.
+    Returns the number of invoices written.
+    """
+    with get_cursor() as cur:
+        cur.execute("DELETE FROM invoice_balances")
+        cur.execute(f"INSERT INTO invoice_balances {BALANCES_FROM_TRANSACTIONS}")
+        cur.execute("SELECT COUNT(*) FROM invoice_balances")
+        return cur.fetchone()[0]
+
+
+def verify_invoice_balances(tolerance=1e-6):
+    """
+    Compares invoice_balances with a fresh aggregate of transactions.
+    Returns one entry per drifted field; an empty list means in sync.
+    """
+    with get_cursor() as cur:
+        cur.execute(BALANCES_FROM_TRANSACTIONS)
+        expected = {r[0]: r[1:] for r in cur.fetchall()}
+
+        cur.execute(f"""
+            SELECT invoice_number, {", ".join(BALANCE_FIELDS)}
+            FROM invoice_balances
+        """)
+        stored = {r[0]: r[1:] for r in cur.fetchall()}
+
+    drift = []
+    zero = (0, 0, 0, 0, 0, 0, None)
+
+    for invoice_number in expected.keys() | stored.keys():
+        exp = expected.get(invoice_number, zero)
+        got = stored.get(invoice_number, zero)
+
+        for field, e, g in zip(BALANCE_FIELDS, exp, got):
+            if field == "last_payment_date":
+                mismatch = e != g
+            else:
+                mismatch = abs((e or 0) - (g or 0)) > tolerance
+            if mismatch:
+                drift.append({
+                    "invoice_number": invoice_number,
+                    "field": field,
+                    "stored": g,
+                    "expected": e
+                })
+
+    return drift
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+
+    if command == "rebuild":
+        print(f"Rebuilt balances for {rebuild_invoice_balances()} invoices.")
+    elif command == "verify":
+        drift = verify_invoice_balances()
+        for d in drift:
+            print(d)
+        print(f"{len(drift)} drifted field(s).")
+        sys.exit(1 if drift else 0)
+    else:
+        raise SystemExit("usage: python -m dispute.balance_service [rebuild|verify]")
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from dispute.db import get_cursor
+
+# -------------------------------------------------
+# COLUMNAR RECONCILIATION
+# -------------------------------------------------
+# Portfolio-wide alternative to dispute_engine.analyze_invoices:
+# invoices and transactions are read in one query each into
+# arrays, and every per-invoice figure is a np.bincount over the
+# transactions' invoice positions. np.bincount adds weights in
+# input order, and transactions arrive in tid order, so paid
+# amounts are bit-for-bit the sums the Python loop produces.
+#
+# The speed-up is in the flat paths (reconcile_columnar and
+# analyze_invoices_columnar(include_transactions=False), 2-2.5x on
+# a 200k-invoice portfolio). Nested output still builds one dict
+# per transaction in Python and measures 0.9-1.2x, so callers that
+# need transactions gain nothing from switching engines.
+
+DEDUCTION_FIELDS = ["tax_deducted", "bank_charges", "gateway_fee", "forex_charges"]
+
+INVOICE_FIELDS = [
+    "invoice_number",
+    "invoice_date",
+    "basic_amount",
+    "tax_amount",
+    "invoice_total_amount",
+    "payment_status",
+    "currency"
+]
+
+
+def _invoice_filter(customer_id, from_date, to_date):
+    where = "i.invoice_date BETWEEN ? AND ?"
+    params = [from_date, to_date]
+    if customer_id is not None:
+        where = "i.customer_id = ? AND " + where
+        params.insert(0, customer_id)
+    return where, params
+
+
+# Transaction columns each caller reads, after the invoice iid
+PAID_COLUMNS = ["amount"]
+BREAKDOWN_COLUMNS = ["amount"] + DEDUCTION_FIELDS
+NESTED_COLUMNS = BREAKDOWN_COLUMNS + ["transaction_date", "currency", "narration"]
+
+
+def _load(customer_id, from_date, to_date, txn_columns):
+    where, params = _invoice_filter(customer_id, from_date, to_date)
+
+    with get_cursor() as cur:
+        cur.execute(f"""
+            SELECT i.iid, {", ".join("i." + f for f in INVOICE_FIELDS)}
+            FROM invoices i
+            WHERE {where}
+            ORDER BY i.invoice_date, i.iid
+        """, params)
+        invoices = cur.fetchall()
+
+        # Portfolio-wide this is a rowid scan of transactions, so
+        # ORDER BY tid costs no sort
+        cur.execute(f"""
+            SELECT i.iid, {", ".join("t." + c for c in txn_columns)}
+            FROM transactions t
+            JOIN invoices i ON i.invoice_number = t.linked_invoice_id
+            WHERE {where}
+            ORDER BY t.tid
+        """, params)
+        transactions = cur.fetchall()
+
+    return invoices, transactions
+
+
+def _reduce(invoices, transactions, with_deductions):
+    """
+    Per-invoice reductions as arrays aligned with `invoices`.
+    Returns (codes, count, paid, deductions) where codes maps each
+    transaction to its invoice position; deductions is empty
+    unless with_deductions.
+    """
+    n = len(invoices)
+    width = 2 + (len(DEDUCTION_FIELDS) if with_deductions else 0)
+
+    # One C-level conversion of the numeric columns; NULL -> nan
+    numeric = np.array(
+        transactions if not transactions or len(transactions[0]) == width
+        else [t[:width] for t in transactions],
+        dtype=float
+    ).reshape(-1, width)
+
+    iids = np.fromiter((row[0] for row in invoices), dtype=np.int64, count=n)
+    order = np.argsort(iids)
+    codes = order[np.searchsorted(iids, numeric[:, 0].astype(np.int64), sorter=order)]
+
+    count = np.bincount(codes, minlength=n)
+    paid = np.bincount(codes, weights=numeric[:, 1], minlength=n)
+
+    deductions = {}
+    if with_deductions:
+        for offset, field in enumerate(DEDUCTION_FIELDS, start=2):
+            # analyze-style sums treat NULL as 0
+            values = np.nan_to_num(numeric[:, offset])
+            deductions[field] = np.bincount(codes, weights=values, minlength=n)
+
+    return codes, count, paid, deductions
+
+
+def _derived_status(paid, outstanding):
+    return np.where(
+        (outstanding == 0) & (paid > 0), "COMPLETED",
+        np.where(paid > 0, "PARTIALLY_PAID", "PENDING")
+    )
+
+
+def reconcile_columnar(customer_id=None, from_date="0000-00-00", to_date="9999-99-99"):
+    """
+    One DataFrame row per invoice dated from_date..to_date (of one
+    customer, or the whole portfolio), in (invoice_date, iid) order:
+    the analyze_invoices figures without nested transactions, plus
+    transaction_count, the deduction breakdown and total_deductions.
+    """
+    invoices, transactions = _load(customer_id, from_date, to_date, BREAKDOWN_COLUMNS)
+    _, count, paid, deductions = _reduce(invoices, transactions, with_deductions=True)
+
+    frame = pd.DataFrame(
+        [row[1:] for row in invoices],
+        columns=INVOICE_FIELDS
+    )
+    total = frame["invoice_total_amount"].to_numpy(dtype=float)
+    outstanding = total - paid
+
+    frame["paid_amount"] = paid
+    frame["outstanding_amount"] = outstanding
+    frame["status"] = _derived_status(paid, outstanding)
+    frame["transaction_count"] = count
+    for field in DEDUCTION_FIELDS:
+        frame[field] = deductions[field]
+    frame["total_deductions"] = sum(deductions[f] for f in DEDUCTION_FIELDS)
+
+    return frame
+
+
+def analyze_invoices_columnar(customer_id=None, from_date="0000-00-00",
+                              to_date="9999-99-99", include_transactions=True):
+    """
+    analyze_invoices output for the invoices reconcile_columnar
+    selects, equal to analyze_invoices on the same rows. Nested
+    transaction lists are built only with include_transactions;
+    otherwise the "transactions" key is left out. Only the flat
+    form is faster than analyze_invoices.
+    """
+    invoices, transactions = _load(
+        customer_id, from_date, to_date,
+        NESTED_COLUMNS if include_transactions else PAID_COLUMNS
+    )
+    codes, count, paid, _ = _reduce(invoices, transactions, with_deductions=False)
+
+    total = np.fromiter((row[5] for row in invoices), dtype=float, count=len(invoices))
+    outstanding = total - paid
+    status = _derived_status(paid, outstanding).tolist()
+
+    nested = None
+    if include_transactions:
+        nested = [[] for _ in invoices]
+        for code, t in zip(codes.tolist(), transactions):
+            # NESTED_COLUMNS order, after the iid
+            nested[code].append({
+                "transaction_date": t[6],
+                "amount": t[1],
+                "tax_deducted": t[2],
+                "bank_charges": t[3],
+                "gateway_fee": t[4],
+                "forex_charges": t[5],
+                "currency": t[7],
+                "narration": t[8]
+            })
+
+    results = []
+    for i, (row, has_txns, paid_i, outstanding_i) in enumerate(zip(
+        invoices, (count > 0).tolist(), paid.tolist(), outstanding.tolist()
+    )):
+        _, inv_no, inv_date, basic_amt, tax_amt, total_amt, _, inv_currency = row
+
+        result = {
+            "invoice_number": inv_no,
+            "invoice_date": inv_date,
+            "currency": inv_currency,
+            "basic_amount": basic_amt,
+            "tax_amount": tax_amt,
+            "invoice_total_amount": total_amt,
+            # analyze_invoices starts from int 0 and never adds
+            "paid_amount": paid_i if has_txns else 0,
+            "outstanding_amount": outstanding_i if has_txns else total_amt,
+            "status": status[i]
+        }
+        if nested is not None:
+            result["transactions"] = nested[i]
+        results.append(result)
+
+    return results
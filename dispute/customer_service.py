@@ -1,4 +1,5 @@
-from dispute.db import get_cursor
+from dispute.db import FETCH_BATCH_SIZE, PAGE_SIZE, get_cursor, iter_rows, keyset_page
+from dispute.reference_cache import invalidate, reference_data
 from dispute.validators import validate_customer
 
 def add_customer(data: dict):
@@ -13,18 +14,59 @@ def add_customer(data: dict):
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, tuple(data.values()))
 
+    invalidate("customers")
+
+@reference_data("customers")
 def fetch_customers():
     with get_cursor() as cur:
         cur.execute("SELECT customer_id, customer_name FROM customers ORDER BY customer_name")
         return cur.fetchall()
 
+CUSTOMERS_FULL_SQL = """
+    SELECT customer_id, customer_name, customer_type,
+           email, phone_number, city, state, country
+    FROM customers
+    ORDER BY customer_name
+"""
+
+@reference_data("customers")
 def fetch_all_customers_full():
     from dispute.db import get_cursor
     with get_cursor() as cur:
-        cur.execute("""
-            SELECT customer_id, customer_name, customer_type,
-                   email, phone_number, city, state, country
-            FROM customers
-            ORDER BY customer_name
-        """)
+        cur.execute(CUSTOMERS_FULL_SQL)
         return cur.fetchall()
+
+def iter_customers(batch_size=FETCH_BATCH_SIZE):
+    """Streaming fetch_all_customers_full, batch_size rows per fetch."""
+    return iter_rows(CUSTOMERS_FULL_SQL, batch_size=batch_size)
+
+def fetch_customers_page(after=None, limit=PAGE_SIZE):
+    """
+    One page of fetch_all_customers_full, keyset-paginated on
+    (customer_name, customer_id). Returns (rows, next_after); pass
+    next_after back as `after` for the following page.
+    """
+    query = """
+        SELECT customer_id, customer_name, customer_type,
+               email, phone_number, city, state, country,
+               customer_name, customer_id
+        FROM customers
+    """
+    params = []
+
+    if after:
+        query += " WHERE (customer_name, customer_id) > (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY customer_name, customer_id LIMIT ?"
+    params.append(limit + 1)
+
+    with get_cursor() as cur:
+        cur.execute(query, params)
+        return keyset_page(cur.fetchall(), limit)
+
+@reference_data("customers")
+def count_customers():
+    with get_cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM customers")
+        return cur.fetchone()[0]
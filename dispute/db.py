@@ -1,22 +1,31 @@
-import sqlite3
 import os
-from contextlib import contextmanager
+from core.sqlite_pool import FETCH_BATCH_SIZE, get_pooled_connection, pooled_cursor
+from core.sqlite_pool import iter_rows as _iter_rows
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "finance_agents.db")
 
 def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    return get_pooled_connection(DB_PATH)["conn"]
 
-@contextmanager
 def get_cursor():
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        yield cur
-        conn.commit()
-    finally:
-        conn.close()
+    return pooled_cursor(DB_PATH)
+
+def iter_rows(sql, params=(), batch_size=FETCH_BATCH_SIZE):
+    return _iter_rows(DB_PATH, sql, params, batch_size)
+
+# Rows per page for keyset-paginated listings
+PAGE_SIZE = 50
+
+def keyset_page(rows, limit):
+    """
+    Splits the rows of a `LIMIT limit + 1` keyset query into
+    (page, next_after). Every row ends with its (sort key, id),
+    which is stripped from the page; next_after is the last row's
+    (sort key, id), or None when there is no further page.
+    """
+    next_after = tuple(rows[limit - 1][-2:]) if len(rows) > limit else None
+    return [row[:-2] for row in rows[:limit]], next_after
 
 def init_dispute_tables():
     with get_cursor() as cur:
@@ -92,3 +101,17 @@ def init_dispute_tables():
             invoice_amount REAL NOT NULL
         )
         """)
+
+    from dispute.migrations import run_migrations
+    run_migrations()
+
+# Bump whenever init_dispute_tables gains DDL; migrations are
+# tracked through their latest version
+DISPUTE_SCHEMA_VERSION = 1
+
+def dispute_schema_version():
+    from dispute.migrations import MIGRATIONS
+    return f"{DISPUTE_SCHEMA_VERSION}.{MIGRATIONS[-1][0]}"
+
+# For core.startup.ensure_started
+DISPUTE_SCHEMA = ("dispute", dispute_schema_version, init_dispute_tables)
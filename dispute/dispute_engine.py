@@ -1,4 +1,75 @@
-from dispute.transaction_service import fetch_transactions_by_invoice
+from itertools import groupby
+
+from dispute.db import FETCH_BATCH_SIZE, iter_rows
+from dispute.transaction_service import fetch_transactions_by_invoices
+
+# Invoices joined to their transactions in (invoice_date, iid, tid)
+# order: idx_invoices_customer_date drives the outer loop and
+# idx_transactions_linked_invoice the inner one, so SQLite streams
+# the join without a sort.
+STREAM_ANALYSIS_SQL = """
+    SELECT i.invoice_number, i.invoice_date, i.basic_amount,
+           i.tax_amount, i.invoice_total_amount, i.payment_status,
+           i.currency,
+           t.tid, t.transaction_date, t.amount, t.tax_deducted,
+           t.bank_charges, t.gateway_fee, t.forex_charges,
+           t.currency, t.narration
+    FROM invoices i
+    LEFT JOIN transactions t ON t.linked_invoice_id = i.invoice_number
+    WHERE i.customer_id = ?
+      AND i.invoice_date BETWEEN ? AND ?
+    ORDER BY i.invoice_date, i.iid, t.tid
+"""
+
+
+def _analyze_invoice(invoice_row, txns):
+    (
+        inv_no,
+        inv_date,
+        basic_amt,
+        tax_amt,
+        total_amt,
+        status,
+        inv_currency
+    ) = invoice_row
+
+    txn_summary = []
+    total_paid = 0
+
+    for t in txns:
+        txn_summary.append({
+            "transaction_date": t[0],
+            "amount": t[1],
+            "tax_deducted": t[2],
+            "bank_charges": t[3],
+            "gateway_fee": t[4],
+            "forex_charges": t[5],
+            "currency": t[6],
+            "narration": t[7]
+        })
+        total_paid += t[1]
+
+    outstanding = total_amt - total_paid
+
+    derived_status = (
+        "COMPLETED" if outstanding == 0 and total_paid > 0
+        else "PARTIALLY_PAID" if total_paid > 0
+        else "PENDING"
+    )
+
+    return {
+        "invoice_number": inv_no,
+        "invoice_date": inv_date,
+        "currency": inv_currency,
+        "basic_amount": basic_amt,
+        "tax_amount": tax_amt,
+        "invoice_total_amount": total_amt,
+        "paid_amount": total_paid,
+        "outstanding_amount": outstanding,
+        "status": derived_status,
+        "transactions": txn_summary
+    }
+
 
 def analyze_invoices(invoice_rows):
     """
@@ -12,57 +83,37 @@ def analyze_invoices(invoice_rows):
       payment_status,
       currency
     )
+
+    Any iterable works; it is read into a list once, since the
+    rows are walked twice.
     """
 
-    results = []
+    invoice_rows = list(invoice_rows)
+    txns_by_invoice = fetch_transactions_by_invoices(
+        [row[0] for row in invoice_rows]
+    )
 
-    for (
-        inv_no,
-        inv_date,
-        basic_amt,
-        tax_amt,
-        total_amt,
-        status,
-        inv_currency
-    ) in invoice_rows:
-
-        txns = fetch_transactions_by_invoice(inv_no)
-
-        txn_summary = []
-        total_paid = 0
-
-        for t in txns:
-            txn_summary.append({
-                "transaction_date": t[0],
-                "amount": t[1],
-                "tax_deducted": t[2],
-                "bank_charges": t[3],
-                "gateway_fee": t[4],
-                "forex_charges": t[5],
-                "currency": t[6],
-                "narration": t[7]
-            })
-            total_paid += t[1]
-
-        outstanding = total_amt - total_paid
-
-        derived_status = (
-            "COMPLETED" if outstanding == 0 and total_paid > 0
-            else "PARTIALLY_PAID" if total_paid > 0
-            else "PENDING"
-        )
-
-        results.append({
-            "invoice_number": inv_no,
-            "invoice_date": inv_date,
-            "currency": inv_currency,
-            "basic_amount": basic_amt,
-            "tax_amount": tax_amt,
-            "invoice_total_amount": total_amt,
-            "paid_amount": total_paid,
-            "outstanding_amount": outstanding,
-            "status": derived_status,
-            "transactions": txn_summary
-        })
+    return [
+        _analyze_invoice(row, txns_by_invoice[row[0]])
+        for row in invoice_rows
+    ]
+
+
+def iter_invoice_analysis(customer_id, from_date="0000-00-00", to_date="9999-99-99",
+                          batch_size=FETCH_BATCH_SIZE):
+    """
+    Streaming analyze_invoices over a customer's invoices dated
+    from_date..to_date, in (invoice_date, iid) order. One joined
+    query is read batch_size rows at a time and one invoice is
+    held in memory at a time, however many invoices match.
+    """
+    rows = iter_rows(
+        STREAM_ANALYSIS_SQL,
+        (customer_id, from_date, to_date),
+        batch_size
+    )
 
-    return results
+    for _, group in groupby(rows, key=lambda r: r[0]):
+        group = list(group)
+        txns = [r[8:] for r in group if r[7] is not None]
+        yield _analyze_invoice(group[0][:7], txns)
@@ -0,0 +1,128 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English / JSON text; good enough
+# for budgeting without pulling in a provider tokenizer
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 6000
+
+DEDUCTION_FIELDS = ("tax_deducted", "bank_charges", "gateway_fee", "forex_charges")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def summarize_invoice(row: dict) -> dict:
+    """
+    Deterministic per-invoice pattern statistics: everything the
+    narrative needs, without any individual transaction rows.
+    """
+    txns = row.get("transactions", [])
+    dates = sorted(t["transaction_date"] for t in txns if t.get("transaction_date"))
+    currencies = sorted({t["currency"] for t in txns if t.get("currency")})
+
+    deductions = {}
+    for field in DEDUCTION_FIELDS:
+        total = sum(t.get(field) or 0 for t in txns)
+        if total:
+            deductions[field] = total
+
+    return {
+        "invoice_number": row["invoice_number"],
+        "invoice_date": row["invoice_date"],
+        "currency": row["currency"],
+        "basic_amount": row["basic_amount"],
+        "tax_amount": row["tax_amount"],
+        "invoice_total_amount": row["invoice_total_amount"],
+        "transaction_count": len(txns),
+        "partial_payments": len(txns) > 1 or (
+            len(txns) == 1 and row["outstanding_amount"] != 0
+        ),
+        "deductions": deductions,
+        "transaction_currencies": currencies,
+        "currency_mismatch": any(c != row["currency"] for c in currencies),
+        "first_transaction_date": dates[0] if dates else None,
+        "last_transaction_date": dates[-1] if dates else None,
+        "paid_amount": row["paid_amount"],
+        "outstanding_amount": row["outstanding_amount"],
+        "status": row["status"]
+    }
+
+
+def render_summaries(summaries) -> str:
+    """One compact JSON object per line, in invoice order."""
+    return "\n".join(
+        json.dumps(s, separators=(",", ":"), ensure_ascii=False)
+        for s in summaries
+    )
+
+
+def _pack(lines, token_budget):
+    """Consecutive lines joined into chunks of at most token_budget."""
+    chunks = []
+    chunk = []
+    tokens = 0
+
+    for line in lines:
+        line_tokens = estimate_tokens(line) + 1
+
+        if chunk and tokens + line_tokens > token_budget:
+            chunks.append("\n".join(chunk))
+            chunk, tokens = [], 0
+
+        chunk.append(line)
+        tokens += line_tokens
+
+    if chunk:
+        chunks.append("\n".join(chunk))
+
+    return chunks
+
+
+def build_explanation_context(analysis_rows, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Returns (contexts, report). contexts holds the compact context
+    as one text when it fits token_budget, or else split into
+    build_context_chunks-style chunks that each fit; callers
+    explain more than one map-reduce style.
+
+    The report's baseline (the repr of analysis_rows the prompt
+    used to embed) costs a full pass over the raw rows, so it is
+    only computed with debug logging on.
+    """
+    lines = [render_summaries([summarize_invoice(row)]) for row in analysis_rows]
+    context = "\n".join(lines)
+    tokens = estimate_tokens(context)
+
+    contexts = [context] if tokens <= token_budget else _pack(lines, token_budget)
+
+    report = {
+        "invoices": len(lines),
+        "tokens": tokens,
+        "token_budget": token_budget,
+        "chunks": len(contexts)
+    }
+
+    if logger.isEnabledFor(logging.DEBUG):
+        report["baseline_tokens"] = estimate_tokens(str(analysis_rows))
+        logger.debug(
+            "Explanation context: %s tokens vs %s for the raw rows",
+            tokens, report["baseline_tokens"]
+        )
+
+    return contexts, report
+
+
+def build_context_chunks(analysis_rows, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Splits the compact context into consecutive chunks of whole
+    invoices, each within token_budget (an invoice larger than the
+    budget on its own gets a chunk to itself). Invoice order is kept.
+    """
+    return _pack(
+        (render_summaries([summarize_invoice(row)]) for row in analysis_rows),
+        token_budget
+    )
@@ -0,0 +1,45 @@
+import hashlib
+import json
+from dispute.db import get_cursor
+
+
+def explanation_cache_key(customer_id, analysis_rows) -> str:
+    """Stable hash of the customer plus the exact analysis payload."""
+    payload = json.dumps(
+        {"customer_id": customer_id, "analysis": analysis_rows},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def fetch_cached_explanation(cache_key):
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT explanation
+            FROM dispute_explanations
+            WHERE cache_key = ?
+        """, (cache_key,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def store_explanation(cache_key, customer_id, explanation):
+    with get_cursor() as cur:
+        cur.execute("""
+            INSERT OR REPLACE INTO dispute_explanations (cache_key, customer_id, explanation)
+            VALUES (?, ?, ?)
+        """, (cache_key, customer_id, explanation))
+
+
+def invalidate_customer_explanations(*customer_ids):
+    """
+    Drops stored explanations for customers whose invoices or
+    transactions changed. Called from the write paths, inside
+    their transaction.
+    """
+    with get_cursor() as cur:
+        cur.executemany("""
+            DELETE FROM dispute_explanations
+            WHERE customer_id = ?
+        """, [(cid,) for cid in set(customer_ids)])
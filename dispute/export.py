@@ -0,0 +1,101 @@
+import csv
+
+from dispute.db import FETCH_BATCH_SIZE
+from dispute.dispute_engine import iter_invoice_analysis
+from dispute.transaction_service import iter_transactions
+
+# -------------------------------------------------
+# STREAMING CSV EXPORTS
+# -------------------------------------------------
+# Rows go from a fetchmany() batch straight to the writer, so an
+# export of millions of transactions runs in constant memory.
+
+TRANSACTION_COLUMNS = [
+    "transaction_date",
+    "amount",
+    "currency",
+    "payment_mode",
+    "bank_name",
+    "linked_invoice_id"
+]
+
+RECONCILIATION_COLUMNS = [
+    "invoice_number",
+    "invoice_date",
+    "currency",
+    "basic_amount",
+    "tax_amount",
+    "invoice_total_amount",
+    "paid_amount",
+    "outstanding_amount",
+    "status",
+    "transaction_count"
+]
+
+
+def export_transactions_csv(out, customer_id=None, invoice_number=None,
+                            batch_size=FETCH_BATCH_SIZE):
+    """
+    Writes iter_transactions to the text file `out` as CSV.
+    Returns the number of data rows written.
+    """
+    writer = csv.writer(out)
+    writer.writerow(TRANSACTION_COLUMNS)
+
+    count = 0
+    for row in iter_transactions(customer_id, invoice_number, batch_size):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def export_reconciliation_csv(out, customer_id, from_date="0000-00-00",
+                              to_date="9999-99-99", batch_size=FETCH_BATCH_SIZE):
+    """
+    Writes one CSV row per invoice of iter_invoice_analysis, the
+    summary the Dispute & Reconciliation view shows. Returns the
+    number of invoices written.
+    """
+    writer = csv.writer(out)
+    writer.writerow(RECONCILIATION_COLUMNS)
+
+    count = 0
+    for result in iter_invoice_analysis(customer_id, from_date, to_date, batch_size):
+        result["transaction_count"] = len(result.pop("transactions"))
+        writer.writerow([result[c] for c in RECONCILIATION_COLUMNS])
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+
+    usage = ("usage: python -m dispute.export transactions <out.csv> "
+             "[--customer ID] [--invoice NO]\n"
+             "       python -m dispute.export reconciliation <out.csv> "
+             "--customer ID [--from YYYY-MM-DD] [--to YYYY-MM-DD]")
+
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ("transactions", "reconciliation"):
+        raise SystemExit(usage)
+
+    kind, path = args[0], args[1]
+    options = dict(zip(args[2::2], args[3::2]))
+    customer_id = int(options["--customer"]) if "--customer" in options else None
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if kind == "transactions":
+            written = export_transactions_csv(
+                f, customer_id, options.get("--invoice")
+            )
+        else:
+            if customer_id is None:
+                raise SystemExit(usage)
+            written = export_reconciliation_csv(
+                f,
+                customer_id,
+                options.get("--from", "0000-00-00"),
+                options.get("--to", "9999-99-99")
+            )
+
+    print(f"Wrote {written} rows to {path}")
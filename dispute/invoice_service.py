@@ -1,4 +1,6 @@
-from dispute.db import get_cursor
+from dispute.db import FETCH_BATCH_SIZE, PAGE_SIZE, get_cursor, iter_rows, keyset_page
+from dispute.explanation_store import invalidate_customer_explanations
+from dispute.reference_cache import invalidate, reference_data
 
 def add_invoice(data: dict):
     with get_cursor() as cur:
@@ -33,6 +35,11 @@ def add_invoice(data: dict):
             data["customer_name"]
         ))
 
+        invalidate_customer_explanations(data["customer_id"])
+
+    invalidate("invoices")
+
+@reference_data("invoices")
 def fetch_open_invoices(customer_id):
     with get_cursor() as cur:
         cur.execute("""
@@ -43,6 +50,7 @@ def fetch_open_invoices(customer_id):
         """, (customer_id,))
         return cur.fetchall()
 
+@reference_data("invoices")
 def fetch_invoices(customer_id=None):
     from dispute.db import get_cursor
 
@@ -61,6 +69,62 @@ def fetch_invoices(customer_id=None):
         cur.execute(query, params)
         return cur.fetchall()
 
+def iter_invoices(customer_id=None, batch_size=FETCH_BATCH_SIZE):
+    """
+    Streaming fetch_invoices, batch_size rows per fetch. Rows come
+    in index order, so no sort buffers the result: (invoice_date,
+    iid) for one customer, iid otherwise.
+    """
+    query = """
+        SELECT invoice_number, invoice_date, due_date,
+               invoice_type, invoice_total_amount, payment_status
+        FROM invoices
+    """
+    params = []
+
+    if customer_id:
+        query += " WHERE customer_id = ? ORDER BY invoice_date, iid"
+        params.append(customer_id)
+    else:
+        query += " ORDER BY iid"
+
+    return iter_rows(query, params, batch_size)
+
+def fetch_invoices_page(customer_id, after=None, limit=PAGE_SIZE):
+    """
+    One page of a customer's fetch_invoices, newest first,
+    keyset-paginated on (invoice_date, iid). Returns
+    (rows, next_after); pass next_after back as `after`.
+    """
+    query = """
+        SELECT invoice_number, invoice_date, due_date,
+               invoice_type, invoice_total_amount, payment_status,
+               invoice_date, iid
+        FROM invoices
+        WHERE customer_id = ?
+    """
+    params = [customer_id]
+
+    if after:
+        query += " AND (invoice_date, iid) < (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY invoice_date DESC, iid DESC LIMIT ?"
+    params.append(limit + 1)
+
+    with get_cursor() as cur:
+        cur.execute(query, params)
+        return keyset_page(cur.fetchall(), limit)
+
+@reference_data("invoices")
+def count_invoices(customer_id):
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*) FROM invoices WHERE customer_id = ?
+        """, (customer_id,))
+        return cur.fetchone()[0]
+
+@reference_data("invoices")
 def fetch_invoices_by_customer(customer_id):
     from dispute.db import get_cursor
     with get_cursor() as cur:
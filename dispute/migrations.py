@@ -0,0 +1,302 @@
+from dispute.db import get_cursor
+
+# -------------------------------------------------
+# VERSIONED SCHEMA MIGRATIONS
+# -------------------------------------------------
+# (version, description, statements) — append only, never edit
+# a migration that has shipped.
+MIGRATIONS = [
+    (1, "Secondary indexes for hot dispute queries", [
+        """CREATE INDEX IF NOT EXISTS idx_transactions_linked_invoice
+           ON transactions(linked_invoice_id)""",
+        """CREATE INDEX IF NOT EXISTS idx_transactions_customer
+           ON transactions(customer_id)""",
+        """CREATE INDEX IF NOT EXISTS idx_invoices_customer_date
+           ON invoices(customer_id, invoice_date)""",
+        """CREATE INDEX IF NOT EXISTS idx_invoices_customer_status
+           ON invoices(customer_id, payment_status)""",
+    ]),
+    (2, "Materialized invoice_balances maintained by triggers", [
+        """CREATE TABLE IF NOT EXISTS invoice_balances (
+            invoice_number TEXT PRIMARY KEY,
+            paid REAL NOT NULL DEFAULT 0,
+            bank_charges REAL NOT NULL DEFAULT 0,
+            tax_deducted REAL NOT NULL DEFAULT 0,
+            gateway_fee REAL NOT NULL DEFAULT 0,
+            forex_charges REAL NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            last_payment_date TEXT
+        )""",
+        """INSERT OR REPLACE INTO invoice_balances
+           SELECT linked_invoice_id,
+                  SUM(amount),
+                  SUM(COALESCE(bank_charges, 0)),
+                  SUM(COALESCE(tax_deducted, 0)),
+                  SUM(COALESCE(gateway_fee, 0)),
+                  SUM(COALESCE(forex_charges, 0)),
+                  COUNT(*),
+                  MAX(transaction_date)
+           FROM transactions
+           GROUP BY linked_invoice_id""",
+        """CREATE TRIGGER IF NOT EXISTS trg_invoice_balances_insert
+           AFTER INSERT ON transactions
+           BEGIN
+               INSERT INTO invoice_balances VALUES (
+                   NEW.linked_invoice_id,
+                   NEW.amount,
+                   COALESCE(NEW.bank_charges, 0),
+                   COALESCE(NEW.tax_deducted, 0),
+                   COALESCE(NEW.gateway_fee, 0),
+                   COALESCE(NEW.forex_charges, 0),
+                   1,
+                   NEW.transaction_date
+               )
+               ON CONFLICT(invoice_number) DO UPDATE SET
+                   paid = paid + excluded.paid,
+                   bank_charges = bank_charges + excluded.bank_charges,
+                   tax_deducted = tax_deducted + excluded.tax_deducted,
+                   gateway_fee = gateway_fee + excluded.gateway_fee,
+                   forex_charges = forex_charges + excluded.forex_charges,
+                   transaction_count = transaction_count + 1,
+                   last_payment_date = CASE
+                       WHEN last_payment_date IS NULL
+                         OR excluded.last_payment_date > last_payment_date
+                       THEN excluded.last_payment_date
+                       ELSE last_payment_date
+                   END;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_invoice_balances_delete
+           AFTER DELETE ON transactions
+           BEGIN
+               UPDATE invoice_balances SET
+                   paid = paid - OLD.amount,
+                   bank_charges = bank_charges - COALESCE(OLD.bank_charges, 0),
+                   tax_deducted = tax_deducted - COALESCE(OLD.tax_deducted, 0),
+                   gateway_fee = gateway_fee - COALESCE(OLD.gateway_fee, 0),
+                   forex_charges = forex_charges - COALESCE(OLD.forex_charges, 0),
+                   transaction_count = transaction_count - 1,
+                   last_payment_date = (
+                       SELECT MAX(transaction_date) FROM transactions
+                       WHERE linked_invoice_id = OLD.linked_invoice_id
+                   )
+               WHERE invoice_number = OLD.linked_invoice_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_invoice_balances_update
+           AFTER UPDATE OF amount, bank_charges, tax_deducted, gateway_fee,
+                           forex_charges, transaction_date, linked_invoice_id
+           ON transactions
+           BEGIN
+               UPDATE invoice_balances SET
+                   paid = paid - OLD.amount,
+                   bank_charges = bank_charges - COALESCE(OLD.bank_charges, 0),
+                   tax_deducted = tax_deducted - COALESCE(OLD.tax_deducted, 0),
+                   gateway_fee = gateway_fee - COALESCE(OLD.gateway_fee, 0),
+                   forex_charges = forex_charges - COALESCE(OLD.forex_charges, 0),
+                   transaction_count = transaction_count - 1,
+                   last_payment_date = (
+                       SELECT MAX(transaction_date) FROM transactions
+                       WHERE linked_invoice_id = OLD.linked_invoice_id
+                         AND tid != NEW.tid
+                   )
+               WHERE invoice_number = OLD.linked_invoice_id;
+
+               INSERT INTO invoice_balances VALUES (
+                   NEW.linked_invoice_id,
+                   NEW.amount,
+                   COALESCE(NEW.bank_charges, 0),
+                   COALESCE(NEW.tax_deducted, 0),
+                   COALESCE(NEW.gateway_fee, 0),
+                   COALESCE(NEW.forex_charges, 0),
+                   1,
+                   NEW.transaction_date
+               )
+               ON CONFLICT(invoice_number) DO UPDATE SET
+                   paid = paid + excluded.paid,
+                   bank_charges = bank_charges + excluded.bank_charges,
+                   tax_deducted = tax_deducted + excluded.tax_deducted,
+                   gateway_fee = gateway_fee + excluded.gateway_fee,
+                   forex_charges = forex_charges + excluded.forex_charges,
+                   transaction_count = transaction_count + 1,
+                   last_payment_date = CASE
+                       WHEN last_payment_date IS NULL
+                         OR excluded.last_payment_date > last_payment_date
+                       THEN excluded.last_payment_date
+                       ELSE last_payment_date
+                   END;
+           END""",
+    ]),
+    (3, "Persistent store for generated dispute explanations", [
+        """CREATE TABLE IF NOT EXISTS dispute_explanations (
+            cache_key TEXT PRIMARY KEY,
+            customer_id INTEGER NOT NULL,
+            explanation TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE INDEX IF NOT EXISTS idx_dispute_explanations_customer
+           ON dispute_explanations(customer_id)""",
+    ]),
+    (4, "Keyset pagination indexes for transaction listings", [
+        """CREATE INDEX IF NOT EXISTS idx_transactions_customer_date
+           ON transactions(customer_id, transaction_date)""",
+        """CREATE INDEX IF NOT EXISTS idx_transactions_invoice_date
+           ON transactions(linked_invoice_id, transaction_date)""",
+    ]),
+    (5, "Let bulk inserts suspend the balance insert trigger", [
+        """CREATE TABLE IF NOT EXISTS balance_trigger_control (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            suspended INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT OR IGNORE INTO balance_trigger_control (id, suspended) VALUES (1, 0)",
+        "DROP TRIGGER IF EXISTS trg_invoice_balances_insert",
+        """CREATE TRIGGER trg_invoice_balances_insert
+           AFTER INSERT ON transactions
+           WHEN COALESCE(
+               (SELECT suspended FROM balance_trigger_control WHERE id = 1), 0
+           ) = 0
+           BEGIN
+               INSERT INTO invoice_balances VALUES (
+                   NEW.linked_invoice_id,
+                   NEW.amount,
+                   COALESCE(NEW.bank_charges, 0),
+                   COALESCE(NEW.tax_deducted, 0),
+                   COALESCE(NEW.gateway_fee, 0),
+                   COALESCE(NEW.forex_charges, 0),
+                   1,
+                   NEW.transaction_date
+               )
+               ON CONFLICT(invoice_number) DO UPDATE SET
+                   paid = paid + excluded.paid,
+                   bank_charges = bank_charges + excluded.bank_charges,
+                   tax_deducted = tax_deducted + excluded.tax_deducted,
+                   gateway_fee = gateway_fee + excluded.gateway_fee,
+                   forex_charges = forex_charges + excluded.forex_charges,
+                   transaction_count = transaction_count + 1,
+                   last_payment_date = CASE
+                       WHEN last_payment_date IS NULL
+                         OR excluded.last_payment_date > last_payment_date
+                       THEN excluded.last_payment_date
+                       ELSE last_payment_date
+                   END;
+           END""",
+    ]),
+]
+
+# -------------------------------------------------
+# HOT QUERIES THAT MUST STAY INDEXED
+# -------------------------------------------------
+# Each entry mirrors a query a service runs; change them together.
+HOT_QUERIES = {
+    "fetch_transactions_by_invoice": (
+        "SELECT amount FROM transactions WHERE linked_invoice_id = ?",
+        ("INV-1",)
+    ),
+    "fetch_transactions_by_invoices": (
+        "SELECT amount FROM transactions WHERE linked_invoice_id IN (?, ?) ORDER BY tid",
+        ("INV-1", "INV-2")
+    ),
+    "insert_transaction_paid": (
+        "SELECT paid FROM invoice_balances WHERE invoice_number = ?",
+        ("INV-1",)
+    ),
+    "fetch_transactions": (
+        "SELECT amount FROM transactions WHERE customer_id = ?",
+        (1,)
+    ),
+    "fetch_open_invoices": (
+        """SELECT invoice_number FROM invoices
+           WHERE customer_id = ?
+           AND UPPER(payment_status) IN ('PENDING', 'PARTIALLY_PAID')""",
+        (1,)
+    ),
+    "fetch_invoice_balance": (
+        "SELECT paid FROM invoice_balances WHERE invoice_number = ?",
+        ("INV-1",)
+    ),
+    "fetch_invoices_by_customer_and_date": (
+        """SELECT invoice_number FROM invoices
+           WHERE customer_id = ? AND invoice_date BETWEEN ? AND ?""",
+        (1, "2025-01-01", "2025-12-31")
+    ),
+    "fetch_customers_page": (
+        """SELECT customer_id FROM customers
+           WHERE (customer_name, customer_id) > (?, ?)
+           ORDER BY customer_name, customer_id LIMIT 51""",
+        ("Acme", 1)
+    ),
+    "fetch_invoices_page": (
+        """SELECT invoice_number FROM invoices
+           WHERE customer_id = ? AND (invoice_date, iid) < (?, ?)
+           ORDER BY invoice_date DESC, iid DESC LIMIT 51""",
+        (1, "2025-06-30", 100)
+    ),
+    "fetch_transactions_page": (
+        """SELECT amount FROM transactions
+           WHERE customer_id = ? AND (transaction_date, tid) < (?, ?)
+           ORDER BY transaction_date DESC, tid DESC LIMIT 51""",
+        (1, "2025-06-30", 100)
+    ),
+    "fetch_transactions_page_by_invoice": (
+        """SELECT amount FROM transactions
+           WHERE customer_id = ? AND linked_invoice_id = ?
+             AND (transaction_date, tid) < (?, ?)
+           ORDER BY transaction_date DESC, tid DESC LIMIT 51""",
+        (1, "INV-1", "2025-06-30", 100)
+    ),
+}
+
+
+def run_migrations():
+    """
+    Applies every pending migration in version order, each in its
+    own transaction, and records it in schema_migrations.
+    Safe to call on every start-up.
+    """
+    with get_cursor() as cur:
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        cur.execute("SELECT version FROM schema_migrations")
+        applied = {r[0] for r in cur.fetchall()}
+
+    for version, description, statements in MIGRATIONS:
+        if version in applied:
+            continue
+
+        with get_cursor() as cur:
+            for sql in statements:
+                cur.execute(sql)
+            cur.execute("""
+                INSERT INTO schema_migrations (version, description)
+                VALUES (?, ?)
+            """, (version, description))
+
+
+def check_query_plans():
+    """
+    Runs EXPLAIN QUERY PLAN over HOT_QUERIES and raises if any of
+    them falls back to a full table scan.
+    """
+    scans = {}
+
+    with get_cursor() as cur:
+        for name, (sql, params) in HOT_QUERIES.items():
+            cur.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            details = [r[3] for r in cur.fetchall()]
+            bad = [d for d in details if d.startswith("SCAN")]
+            if bad:
+                scans[name] = bad
+
+    if scans:
+        raise RuntimeError(f"Hot queries fall back to table scans: {scans}")
+
+
+if __name__ == "__main__":
+    from dispute.db import init_dispute_tables
+
+    init_dispute_tables()
+    check_query_plans()
+    print("Schema up to date; all hot queries use indexes.")
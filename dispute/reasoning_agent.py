@@ -21,55 +21,33 @@
 #         PROMPT.format(context=dispute_context)
 #     ).content
 
-from typing import List, Dict
-from core.llm_factory import get_llm
+import asyncio
+import logging
+import time
+from typing import Dict, Iterator, List
+from core.async_runtime import run_async
+from core.llm_scheduler import ainvoke_llm, invoke_llm, stream_llm
+from dispute.explanation_context import (
+    DEFAULT_TOKEN_BUDGET,
+    build_context_chunks,
+    build_explanation_context
+)
 
+logger = logging.getLogger(__name__)
 
-def generate_dispute_explanation(
-    customer_name: str,
-    analysis_rows: List[Dict]
-) -> str:
-    """
-    analysis_rows structure (example):
+# Map-reduce settings for selections too large for one request
+MAPREDUCE_MAX_CONCURRENCY = 4
+CHUNK_MAX_RETRIES = 3
 
-    [
-        {
-            "invoice_number": str,
-            "invoice_date": str,
-            "currency": str,
-            "basic_amount": float,
-            "tax_amount": float,
-            "invoice_total_amount": float,
-            "paid_amount": float,
-            "outstanding_amount": float,
-            "status": str,
-            "transactions": [
-                {
-                    "transaction_date": str,
-                    "amount": float,
-                    "tax_deducted": float,
-                    "bank_charges": float,
-                    "gateway_fee": float,
-                    "forex_charges": float,
-                    "currency": str,
-                    "narration": str
-                }
-            ]
-        }
-    ]
-    """
-
-    llm = get_llm(provider="groq")
-
-    # -------------------------------
-    # SYSTEM PROMPT (NON-NEGOTIABLE)
-    # -------------------------------
-    system_prompt = """
+# -------------------------------
+# SYSTEM PROMPT (NON-NEGOTIABLE)
+# -------------------------------
+SYSTEM_PROMPT = """
 You are a Senior Finance Reconciliation Analyst preparing an audit-grade
 reconciliation narrative for finance, compliance, and audit stakeholders.
 
 YOUR RESPONSIBILITY:
-- Read and understand ALL invoice and transaction data provided.
+- Read and understand ALL invoice data and transaction statistics provided.
 - Internally analyze transaction patterns per invoice.
 - Produce a SUMMARY-ONLY explanation.
 
@@ -83,25 +61,26 @@ ABSOLUTE RULES (MANDATORY):
 - Do NOT repeat tables or list transaction rows.
 - Do NOT enumerate individual transactions, even if many exist.
 
-Transactions are provided ONLY for internal analysis,
-NOT for reproduction in the explanation.
+Transactions are provided ONLY as pre-aggregated statistics per invoice
+(count, deductions present with totals, currencies, date span),
+for pattern-level explanation, NOT for reproduction.
 
 Your output must remain readable even if:
 - One invoice has hundreds of transactions
 - Multiple invoices are analyzed together
 """
 
-    # -------------------------------
-    # USER PROMPT (TASK-SPECIFIC)
-    # -------------------------------
-    user_prompt = f"""
+# -------------------------------
+# USER PROMPT (TASK-SPECIFIC)
+# -------------------------------
+USER_PROMPT = """
 Customer Name:
 {customer_name}
 
-Reconciliation Dataset (Invoices with Transactions):
-{analysis_rows}
+Reconciliation Dataset (one JSON object per invoice, transactions pre-aggregated):
+{context}
 
-INSTRUCTIONS FOR OUTPUT:
+{scope}INSTRUCTIONS FOR OUTPUT:
 
 Generate a structured, narrative reconciliation explanation.
 
@@ -158,11 +137,182 @@ Tables are already visible to the user.
 Your task is to explain the data, not restate it.
 """
 
-    response = llm.invoke(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+CHUNK_SCOPE = """This dataset is part {part} of {parts} of a larger reconciliation.
+Write sections ONLY for the invoices listed above, with no overall
+introduction or closing summary; the parts are joined in order.
+
+"""
+
+
+def _build_messages(customer_name, context, part=None, parts=None):
+    scope = CHUNK_SCOPE.format(part=part, parts=parts) if parts else ""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": USER_PROMPT.format(
+            customer_name=customer_name,
+            context=context,
+            scope=scope
+        )}
+    ]
+
+
+def generate_dispute_explanation(
+    customer_name: str,
+    analysis_rows: List[Dict],
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> str:
+    """
+    analysis_rows structure (example):
+
+    [
+        {
+            "invoice_number": str,
+            "invoice_date": str,
+            "currency": str,
+            "basic_amount": float,
+            "tax_amount": float,
+            "invoice_total_amount": float,
+            "paid_amount": float,
+            "outstanding_amount": float,
+            "status": str,
+            "transactions": [
+                {
+                    "transaction_date": str,
+                    "amount": float,
+                    "tax_deducted": float,
+                    "bank_charges": float,
+                    "gateway_fee": float,
+                    "forex_charges": float,
+                    "currency": str,
+                    "narration": str
+                }
+            ]
+        }
+    ]
+
+    Only per-invoice pattern statistics (see explanation_context)
+    are sent to the LLM, never the individual transactions.
+    Selections over token_budget are explained map-reduce style.
+    """
+
+    contexts, report = build_explanation_context(analysis_rows, token_budget)
+    logger.info(
+        "Dispute explanation context: %s invoices, %s tokens, %s chunk(s)",
+        report["invoices"], report["tokens"], report["chunks"]
+    )
+
+    if len(contexts) > 1:
+        return run_async(_amapreduce(customer_name, contexts))
+
+    response = invoke_llm("groq", _build_messages(customer_name, contexts[0]))
+
+    return response.content.strip()
+
+
+def stream_dispute_explanation(
+    customer_name: str,
+    analysis_rows: List[Dict],
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> Iterator[str]:
+    """
+    Streaming generate_dispute_explanation: yields text fragments
+    as the LLM produces them (leading whitespace dropped). Logs
+    time-to-first-token and total time. Selections over budget
+    are explained map-reduce style and yielded as one fragment.
+    """
+    start = time.perf_counter()
+    contexts, report = build_explanation_context(analysis_rows, token_budget)
+    logger.info(
+        "Dispute explanation context: %s invoices, %s tokens, %s chunk(s)",
+        report["invoices"], report["tokens"], report["chunks"]
     )
 
+    if len(contexts) > 1:
+        yield run_async(_amapreduce(customer_name, contexts))
+        logger.info("Dispute explanation (map-reduce) total %.2fs",
+                    time.perf_counter() - start)
+        return
+
+    first_token_at = None
+
+    for chunk in stream_llm("groq", _build_messages(customer_name, contexts[0])):
+        text = chunk.content
+        if first_token_at is None:
+            text = text.lstrip()
+            if not text:
+                continue
+            first_token_at = time.perf_counter()
+            logger.info("Dispute explanation first token after %.2fs",
+                        first_token_at - start)
+        yield text
+
+    logger.info("Dispute explanation streamed in %.2fs total",
+                time.perf_counter() - start)
+
+
+async def _explain_chunk(customer_name, context, part, parts,
+                         semaphore, max_retries):
+    """One chunk; the scheduler retries it on its own with backoff."""
+    messages = _build_messages(customer_name, context, part, parts)
+
+    try:
+        async with semaphore:
+            response = await ainvoke_llm("groq", messages, max_retries=max_retries)
+    except Exception as e:
+        raise RuntimeError(f"Explanation part {part} of {parts} failed: {e}") from e
+
     return response.content.strip()
+
+
+async def agenerate_dispute_explanation_mapreduce(
+    customer_name: str,
+    analysis_rows: List[Dict],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_concurrency: int = MAPREDUCE_MAX_CONCURRENCY,
+    max_retries: int = CHUNK_MAX_RETRIES
+) -> str:
+    """
+    Splits invoices into token-bounded chunks, explains them
+    concurrently (at most max_concurrency requests in flight) and
+    stitches the per-invoice sections back in invoice order. A part
+    that still fails after its retries is left out with a note in
+    its place; only when every part fails is the error raised.
+    """
+    return await _amapreduce(
+        customer_name,
+        build_context_chunks(analysis_rows, token_budget),
+        max_concurrency,
+        max_retries
+    )
+
+
+async def _amapreduce(customer_name, chunks, max_concurrency=MAPREDUCE_MAX_CONCURRENCY,
+                      max_retries=CHUNK_MAX_RETRIES):
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    results = await asyncio.gather(*(
+        _explain_chunk(customer_name, context, part, len(chunks),
+                       semaphore, max_retries)
+        for part, context in enumerate(chunks, start=1)
+    ), return_exceptions=True)
+
+    sections = []
+    failed = []
+
+    for part, result in enumerate(results, start=1):
+        if not isinstance(result, BaseException):
+            sections.append(result)
+        elif isinstance(result, Exception):
+            logger.warning("%s", result)
+            failed.append(result)
+            sections.append(
+                f"[Part {part} of {len(chunks)} could not be explained; "
+                f"those invoices are missing from this summary.]"
+            )
+        else:
+            raise result
+
+    if len(failed) == len(chunks):
+        raise failed[0]
+
+    return "\n\n".join(sections)
@@ -9,13 +9,12 @@ def reconcile_invoice(invoice_number):
         invoice_total = cur.fetchone()[0]
 
         cur.execute("""
-        SELECT amount, bank_charges, tax_deducted, gateway_fee, forex_charges
-        FROM transactions WHERE linked_invoice_id = ?
+        SELECT paid, bank_charges + tax_deducted + gateway_fee + forex_charges
+        FROM invoice_balances WHERE invoice_number = ?
         """, (invoice_number,))
-        rows = cur.fetchall()
+        balance = cur.fetchone()
 
-    paid = sum(r[0] for r in rows)
-    deductions = sum((r[1] or 0)+(r[2] or 0)+(r[3] or 0)+(r[4] or 0) for r in rows)
+    paid, deductions = balance if balance else (0, 0)
 
     return {
         "invoice_total": invoice_total,
@@ -0,0 +1,60 @@
+import functools
+import threading
+import time
+
+# -------------------------------------------------
+# PROCESS-LEVEL REFERENCE DATA CACHE
+# -------------------------------------------------
+# Customer and invoice lists behind every UI selectbox. Entries
+# live for REFERENCE_TTL_SECONDS, so writes from other processes
+# show up within that window; writes in this process invalidate
+# their namespace straight after committing.
+REFERENCE_TTL_SECONDS = 60
+
+_lock = threading.Lock()
+_entries = {}          # (namespace, function, args) -> (expires_at, value)
+_generations = {}      # namespace -> bumped on every invalidation
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def reference_data(namespace, ttl=REFERENCE_TTL_SECONDS):
+    """Caches a fetch function's result under namespace for ttl seconds."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (namespace, fn.__name__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None and entry[0] > now:
+                    _stats["hits"] += 1
+                    return entry[1]
+                _stats["misses"] += 1
+                generation = _generations.get(namespace, 0)
+
+            value = fn(*args, **kwargs)
+
+            # An invalidation while loading means value may be stale
+            with _lock:
+                if _generations.get(namespace, 0) == generation:
+                    _entries[key] = (now + ttl, value)
+            return value
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def invalidate(*namespaces):
+    with _lock:
+        for namespace in namespaces:
+            _generations[namespace] = _generations.get(namespace, 0) + 1
+            for key in [k for k in _entries if k[0] == namespace]:
+                del _entries[key]
+        _stats["invalidations"] += 1
+
+
+def reference_cache_stats() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_entries)}
@@ -1,6 +1,69 @@
+import os
 import pandas as pd
-import pdfplumber
+import shutil
 import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from core.pdf_extract import extract_pages, iter_page_ranges
+
+# -------------------------------------------------
+# BANK COLUMN PROFILES
+# -------------------------------------------------
+# Statement header -> transactions column. "defaults" fills
+# columns the statement does not carry; callers can add more
+# (customer, linked invoice) per import.
+BANK_PROFILES = {
+    "default": {
+        "columns": {
+            "Date": "transaction_date",
+            "Narration": "narration",
+            "Amount": "amount",
+            "Reference": "reference_number",
+            "Currency": "currency",
+        },
+        "date_format": "%Y-%m-%d",
+        "defaults": {"currency": "INR", "payment_mode": "Bank Transfer"},
+    },
+    "HDFC": {
+        "columns": {
+            "Date": "transaction_date",
+            "Narration": "narration",
+            "Chq./Ref.No.": "reference_number",
+            "Deposit Amt.": "amount",
+        },
+        "date_format": "%d/%m/%y",
+        "defaults": {"bank_name": "HDFC", "currency": "INR", "payment_mode": "NEFT"},
+    },
+    "ICICI": {
+        "columns": {
+            "Transaction Date": "transaction_date",
+            "Transaction Remarks": "narration",
+            "Cheque Number": "reference_number",
+            "Deposit Amount (INR )": "amount",
+        },
+        "date_format": "%d/%m/%Y",
+        "defaults": {"bank_name": "ICICI", "currency": "INR", "payment_mode": "NEFT"},
+    },
+    "SBI": {
+        "columns": {
+            "Txn Date": "transaction_date",
+            "Description": "narration",
+            "Ref No./Cheque No.": "reference_number",
+            "Credit": "amount",
+        },
+        "date_format": "%d %b %Y",
+        "defaults": {"bank_name": "SBI", "currency": "INR", "payment_mode": "NEFT"},
+    },
+}
+
+AMOUNT_COLUMNS = {
+    "amount", "bank_charges", "tax_deducted", "gateway_fee",
+    "forex_charges", "invoice_amount"
+}
+
+# Rejected rows listed in an import summary; the rest are counted
+MAX_IMPORT_ERRORS = 1000
 
 def parse_statement(file):
     if file.name.endswith(".csv"):
@@ -9,8 +72,217 @@ def parse_statement(file):
         return pd.read_excel(file)
     if file.name.endswith(".pdf"):
         rows = []
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                rows.extend(page.extract_table()[1:])
+        with _as_path(file) as path:
+            for table in extract_pages(path, "table"):
+                rows.extend(table[1:])
         return pd.DataFrame(rows)
     raise ValueError("Unsupported format")
+
+
+@contextmanager
+def _as_path(file):
+    """
+    Worker processes need a path, not an upload buffer:
+    spool uploads to a temp file for the duration of the block.
+    """
+    if isinstance(file, str):
+        yield file
+        return
+
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(file, tmp)
+    try:
+        yield tmp.name
+    finally:
+        os.unlink(tmp.name)
+
+
+def _to_amount(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if pd.isna(value) else float(value)
+    value = str(value).replace(",", "").strip()
+    return float(value) if value else None
+
+
+def _to_date(value, date_format):
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    value = str(value).strip()
+    try:
+        return datetime.strptime(value, date_format).date().isoformat()
+    except ValueError:
+        return value
+
+
+def normalize_rows(records, profile, defaults=None, errors=None):
+    """
+    Maps raw statement records (header -> value) onto the
+    transactions schema using a bank profile. Rows without an
+    amount in the mapped column (e.g. debits) are dropped.
+
+    records are (source, record) pairs, source being where the
+    record sits in the statement (e.g. {"row": 12}). Returns
+    (sources, rows) for the kept rows. A record with a non-numeric
+    amount is skipped and reported to errors(source, message), if
+    given.
+    """
+    columns = profile["columns"]
+    base = {**profile.get("defaults", {}), **(defaults or {})}
+    sources, rows = [], []
+
+    for source, record in records:
+        row = dict(base)
+        try:
+            for header, column in columns.items():
+                value = record.get(header)
+                if column in AMOUNT_COLUMNS:
+                    try:
+                        value = _to_amount(value)
+                    except ValueError:
+                        raise ValueError(f"{header}: {value!r} is not a number") from None
+                elif column == "transaction_date":
+                    value = _to_date(value, profile.get("date_format", "%Y-%m-%d"))
+                elif isinstance(value, float) and pd.isna(value):
+                    value = None
+                if value is not None:
+                    row[column] = value
+        except ValueError as e:
+            if errors is not None:
+                errors(source, str(e))
+            continue
+
+        if row.get("amount"):
+            sources.append(source)
+            rows.append(row)
+
+    return sources, rows
+
+
+# Raw readers yield lists of (source, record); CSV and XLSX rows
+# are numbered as in the file, the header being row 1
+
+def _iter_csv(file, batch_size, columns):
+    row = 1
+    # Only empty cells are missing; "N/A" in an amount column is an error
+    chunks = pd.read_csv(file, chunksize=batch_size, dtype=str,
+                         keep_default_na=False, na_values=[""])
+    for chunk in chunks:
+        records = chunk.to_dict("records")
+        yield [({"row": row + n}, record) for n, record in enumerate(records, start=1)]
+        row += len(records)
+
+
+def _iter_xlsx(file, batch_size, columns):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        batch = []
+        for row, values in enumerate(rows, start=2):
+            batch.append(({"row": row}, dict(zip(header, values))))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        wb.close()
+
+
+def _iter_pdf(file, batch_size, columns):
+    """
+    A table continued from the previous page has no header row:
+    the first header seen is kept and reused for any page whose
+    first row names none of the profile's columns.
+    """
+    batch = []
+    header = None
+    page = 0
+    with _as_path(file) as path:
+        for tables in iter_page_ranges(path, "table"):
+            for table in tables:
+                page += 1
+                if not table:
+                    continue
+
+                first = [str(h).strip() if h is not None else "" for h in table[0]]
+                if header is None or any(h in columns for h in first):
+                    header, start = first, 1
+                else:
+                    start = 0
+
+                batch.extend(
+                    ({"page": page, "row": row}, dict(zip(header, values)))
+                    for row, values in enumerate(table[start:], start=start + 1)
+                )
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def iter_statement_batches(file, bank="default", defaults=None, batch_size=5000,
+                           errors=None):
+    """
+    Streaming parse_statement: yields (sources, rows) per batch of
+    at most roughly batch_size rows already mapped to the
+    transactions schema, so memory stays flat regardless of
+    statement size. sources[i] locates rows[i] in the statement.
+    PDF batches are cut on page boundaries. Unparseable rows go to
+    errors(source, message), as in normalize_rows.
+    """
+    if bank not in BANK_PROFILES:
+        raise ValueError(f"Unknown bank profile: {bank}")
+    profile = BANK_PROFILES[bank]
+
+    name = getattr(file, "name", file)
+    if name.endswith(".csv"):
+        reader = _iter_csv
+    elif name.endswith(".xlsx"):
+        reader = _iter_xlsx
+    elif name.endswith(".pdf"):
+        reader = _iter_pdf
+    else:
+        raise ValueError("Unsupported format")
+
+    for records in reader(file, batch_size, profile["columns"]):
+        sources, rows = normalize_rows(records, profile, defaults, errors)
+        if rows:
+            yield sources, rows
+
+
+def import_statement(file, bank="default", defaults=None, batch_size=5000):
+    """
+    Streams a statement straight into insert_transactions_bulk.
+    Returns accepted / rejected counts and the rejected rows'
+    errors, each with its statement row (and page, for PDFs). Only
+    the first MAX_IMPORT_ERRORS are listed; errors_omitted counts
+    the rest.
+    """
+    from dispute.transaction_service import insert_transactions_bulk
+
+    summary = {"accepted": 0, "rejected": 0, "errors": [], "errors_omitted": 0}
+
+    def reject(source, error):
+        summary["rejected"] += 1
+        if len(summary["errors"]) < MAX_IMPORT_ERRORS:
+            summary["errors"].append({**source, "error": error})
+        else:
+            summary["errors_omitted"] += 1
+
+    for sources, rows in iter_statement_batches(file, bank, defaults, batch_size, reject):
+        for result in insert_transactions_bulk(rows):
+            if result["accepted"]:
+                summary["accepted"] += 1
+            else:
+                reject(sources[result["index"]], result["error"])
+
+    return summary
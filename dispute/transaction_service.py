@@ -1,4 +1,138 @@
-from dispute.db import get_cursor
+import json
+import math
+from operator import itemgetter
+from dispute.db import FETCH_BATCH_SIZE, PAGE_SIZE, get_cursor, iter_rows, keyset_page
+from dispute.explanation_store import invalidate_customer_explanations
+from dispute.reference_cache import invalidate, reference_data
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+INSERT_TRANSACTION_SQL = """
+INSERT INTO transactions (
+    transaction_date,
+    narration,
+    amount,
+    bank_name,
+    reference_number,
+    account_number,
+    account_type,
+    payment_mode,
+    currency,
+    bank_charges,
+    tax_deducted,
+    gateway_fee,
+    forex_charges,
+    customer_id,
+    customer_name,
+    linked_invoice_id,
+    invoice_amount
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# NOT NULL columns of transactions without a default
+MANDATORY_TRANSACTION_FIELDS = [
+    "transaction_date",
+    "amount",
+    "bank_name",
+    "account_number",
+    "payment_mode",
+    "currency",
+    "customer_id",
+    "customer_name",
+    "linked_invoice_id",
+    "invoice_amount"
+]
+
+# Column order of INSERT_TRANSACTION_SQL / _transaction_params
+TRANSACTION_PARAM_FIELDS = [
+    "transaction_date", "narration", "amount", "bank_name",
+    "reference_number", "account_number", "account_type",
+    "payment_mode", "currency", "bank_charges", "tax_deducted",
+    "gateway_fee", "forex_charges", "customer_id", "customer_name",
+    "linked_invoice_id", "invoice_amount"
+]
+NUMERIC_TRANSACTION_FIELDS = [
+    "amount", "invoice_amount", "bank_charges", "tax_deducted",
+    "gateway_fee", "forex_charges"
+]
+
+_MANDATORY_AT = [(TRANSACTION_PARAM_FIELDS.index(f), f) for f in MANDATORY_TRANSACTION_FIELDS]
+_NUMERIC_AT = [(TRANSACTION_PARAM_FIELDS.index(f), f) for f in NUMERIC_TRANSACTION_FIELDS]
+_mandatory_values = itemgetter(*(pos for pos, _ in _MANDATORY_AT))
+_numeric_values = itemgetter(*(pos for pos, _ in _NUMERIC_AT))
+_PLAIN_NUMBER_TYPES = {int, float, type(None)}
+
+
+def _to_number(value):
+    """Finite int / float as is, Decimal or numeric text as float, else None."""
+    if type(value) is not int and type(value) is not float:
+        if isinstance(value, bool):
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+    return value if math.isfinite(value) else None
+
+
+def _bulk_params(data: dict):
+    """
+    (params, None) for a row insert_transactions_bulk can write, or
+    (None, error). Amounts are coerced to numbers, so neither the
+    balance checks nor the NOT NULL columns can fail mid-batch.
+    """
+    try:
+        params = _transaction_params(data)
+    except KeyError as e:
+        return None, f"{e.args[0]} is mandatory"
+
+    # Fast path: nothing missing, plain finite numbers
+    numbers = _numeric_values(params)
+    if (None not in _mandatory_values(params)
+            and set(map(type, numbers)) <= _PLAIN_NUMBER_TYPES
+            and math.isfinite(sum(filter(None, numbers)))):
+        return params, None
+
+    params = list(params)
+    for pos, field in _MANDATORY_AT:
+        if params[pos] is None:
+            return None, f"{field} is mandatory"
+
+    for pos, field in _NUMERIC_AT:
+        value = params[pos]
+        if value is None:
+            continue
+        number = _to_number(value)
+        if number is None:
+            return None, f"{field} must be a number, got {value!r}"
+        params[pos] = number
+
+    return params, None
+
+
+def _transaction_params(data: dict):
+    return (
+        data["transaction_date"],
+        data.get("narration"),
+        data["amount"],
+        data["bank_name"],
+        data.get("reference_number"),
+        data["account_number"],
+        data.get("account_type"),
+        data["payment_mode"],
+        data["currency"],
+        data.get("bank_charges", 0),
+        data.get("tax_deducted", 0),
+        data.get("gateway_fee", 0),
+        data.get("forex_charges", 0),
+        data["customer_id"],
+        data["customer_name"],
+        data["linked_invoice_id"],
+        data["invoice_amount"]
+    )
+
 
 def insert_transaction(data: dict):
     invoice_number = data["linked_invoice_id"]
@@ -8,14 +142,15 @@ def insert_transaction(data: dict):
     with get_cursor() as cur:
 
         # ----------------------------------
-        # 1. Calculate total paid so far
+        # 1. Total paid so far (materialized)
         # ----------------------------------
         cur.execute("""
-            SELECT COALESCE(SUM(amount), 0)
-            FROM transactions
-            WHERE linked_invoice_id = ?
+            SELECT paid
+            FROM invoice_balances
+            WHERE invoice_number = ?
         """, (invoice_number,))
-        total_paid_so_far = cur.fetchone()[0]
+        row = cur.fetchone()
+        total_paid_so_far = row[0] if row else 0
 
         remaining_amount = invoice_amount - total_paid_so_far
 
@@ -31,46 +166,7 @@ def insert_transaction(data: dict):
         # ----------------------------------
         # 3. Insert transaction
         # ----------------------------------
-        cur.execute("""
-        INSERT INTO transactions (
-            transaction_date,
-            narration,
-            amount,
-            bank_name,
-            reference_number,
-            account_number,
-            account_type,
-            payment_mode,
-            currency,
-            bank_charges,
-            tax_deducted,
-            gateway_fee,
-            forex_charges,
-            customer_id,
-            customer_name,
-            linked_invoice_id,
-            invoice_amount
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data["transaction_date"],
-            data.get("narration"),
-            current_txn_amount,
-            data["bank_name"],
-            data.get("reference_number"),
-            data["account_number"],
-            data.get("account_type"),
-            data["payment_mode"],
-            data["currency"],
-            data.get("bank_charges", 0),
-            data.get("tax_deducted", 0),
-            data.get("gateway_fee", 0),
-            data.get("forex_charges", 0),
-            data["customer_id"],
-            data["customer_name"],
-            invoice_number,
-            invoice_amount
-        ))
+        cur.execute(INSERT_TRANSACTION_SQL, _transaction_params(data))
 
         # ----------------------------------
         # 4. Update invoice status
@@ -86,6 +182,143 @@ def insert_transaction(data: dict):
             WHERE invoice_number = ?
         """, (new_status, invoice_number))
 
+        invalidate_customer_explanations(data["customer_id"])
+
+    # Payment status moved; open-invoice lists are stale
+    invalidate("invoices", "transactions")
+
+def insert_transactions_bulk(rows):
+    """
+    Bulk insert_transaction. Rows are grouped by linked_invoice_id
+    and checked in order against the running remaining balance in
+    memory, exactly as sequential insert_transaction calls would.
+    Accepted rows are written with one executemany and affected
+    invoice statuses with one UPDATE, all in a single transaction.
+
+    Rows with a missing mandatory field or a non-numeric amount are
+    rejected on their own; numeric text and Decimals are coerced.
+
+    Returns one {"index", "accepted", "error"} dict per input row.
+    """
+    results = [
+        {"index": i, "accepted": False, "error": None}
+        for i in range(len(rows))
+    ]
+    params_by_index = {}
+    new_statuses = {}
+    new_balances = {}
+
+    by_invoice = {}
+    for i, data in enumerate(rows):
+        by_invoice.setdefault(data.get("linked_invoice_id"), []).append(i)
+
+    with get_cursor() as cur:
+        if not cur.connection.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+
+        # ----------------------------------
+        # 1. Current balance of every invoice
+        # ----------------------------------
+        invoice_numbers = [inv for inv in by_invoice if inv is not None]
+        balances = {}
+        for start in range(0, len(invoice_numbers), IN_CHUNK_SIZE):
+            chunk = invoice_numbers[start:start + IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            cur.execute(f"""
+                SELECT invoice_number, paid, bank_charges, tax_deducted,
+                       gateway_fee, forex_charges, transaction_count,
+                       last_payment_date
+                FROM invoice_balances
+                WHERE invoice_number IN ({placeholders})
+            """, chunk)
+            balances.update((r[0], list(r[1:])) for r in cur.fetchall())
+
+        # ----------------------------------
+        # 2. Validate each invoice group
+        # ----------------------------------
+        for invoice_number, indexes in by_invoice.items():
+            balance = balances.get(invoice_number, [0, 0, 0, 0, 0, 0, None])
+            accepted_any = False
+
+            for i in indexes:
+                params, error = _bulk_params(rows[i])
+                if error:
+                    results[i]["error"] = error
+                    continue
+
+                amount = params[2]
+                remaining_amount = params[16] - balance[0]
+
+                if amount > remaining_amount:
+                    results[i]["error"] = (
+                        f"Transaction amount exceeds remaining invoice balance. "
+                        f"Remaining amount: {remaining_amount}"
+                    )
+                    continue
+
+                new_statuses[invoice_number] = (
+                    "COMPLETED" if amount == remaining_amount
+                    else "PARTIALLY_PAID"
+                )
+
+                # Same running sums the insert trigger would produce
+                balance[0] += amount
+                balance[1] += params[9] or 0
+                balance[2] += params[10] or 0
+                balance[3] += params[11] or 0
+                balance[4] += params[12] or 0
+                balance[5] += 1
+                if balance[6] is None or params[0] > balance[6]:
+                    balance[6] = params[0]
+
+                accepted_any = True
+                params_by_index[i] = params
+                results[i]["accepted"] = True
+
+            if accepted_any:
+                new_balances[invoice_number] = balance
+
+        # ----------------------------------
+        # 3. Insert accepted rows in input order.
+        #    The per-row balance trigger is suspended through
+        #    balance_trigger_control for the executemany only; the
+        #    flag change is uncommitted, so no other connection
+        #    sees it. Balances are written once per invoice.
+        # ----------------------------------
+        cur.execute("UPDATE balance_trigger_control SET suspended = 1 WHERE id = 1")
+        try:
+            cur.executemany(
+                INSERT_TRANSACTION_SQL,
+                [params_by_index[i] for i in sorted(params_by_index)]
+            )
+        finally:
+            cur.execute("UPDATE balance_trigger_control SET suspended = 0 WHERE id = 1")
+
+        cur.executemany(
+            "INSERT OR REPLACE INTO invoice_balances VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(inv, *balance) for inv, balance in new_balances.items()]
+        )
+
+        # ----------------------------------
+        # 4. Update invoice statuses
+        # ----------------------------------
+        if new_statuses:
+            cur.execute("""
+                UPDATE invoices
+                SET payment_status = s.value
+                FROM json_each(?) AS s
+                WHERE invoices.invoice_number = s.key
+            """, (json.dumps(new_statuses),))
+
+        invalidate_customer_explanations(
+            *(rows[i]["customer_id"] for i in params_by_index)
+        )
+
+    if params_by_index:
+        invalidate("invoices", "transactions")
+
+    return results
+
 def fetch_transactions(customer_id=None, invoice_number=None):
     from dispute.db import get_cursor
 
@@ -109,6 +342,93 @@ def fetch_transactions(customer_id=None, invoice_number=None):
         return cur.fetchall()
 
 
+def iter_transactions(customer_id=None, invoice_number=None,
+                      batch_size=FETCH_BATCH_SIZE):
+    """
+    Streaming fetch_transactions in tid order, batch_size rows per
+    fetch; memory stays flat however many rows match.
+    """
+    query = """
+        SELECT transaction_date, amount, currency, payment_mode,
+               bank_name, linked_invoice_id
+        FROM transactions
+    """
+    where, params = [], []
+
+    if customer_id:
+        where.append("customer_id = ?")
+        params.append(customer_id)
+
+    if invoice_number:
+        where.append("linked_invoice_id = ?")
+        params.append(invoice_number)
+
+    if where:
+        query += " WHERE " + " AND ".join(where)
+
+    return iter_rows(query + " ORDER BY tid", params, batch_size)
+
+
+def fetch_transactions_page(customer_id, invoice_number=None, after=None,
+                            limit=PAGE_SIZE):
+    """
+    One page of fetch_transactions, newest first, keyset-paginated
+    on (transaction_date, tid). Returns (rows, next_after); pass
+    next_after back as `after`.
+    """
+    query = """
+        SELECT transaction_date, amount, currency, payment_mode,
+               bank_name, linked_invoice_id,
+               transaction_date, tid
+        FROM transactions
+        WHERE customer_id = ?
+    """
+    params = [customer_id]
+
+    if invoice_number:
+        query += " AND linked_invoice_id = ?"
+        params.append(invoice_number)
+
+    if after:
+        query += " AND (transaction_date, tid) < (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY transaction_date DESC, tid DESC LIMIT ?"
+    params.append(limit + 1)
+
+    with get_cursor() as cur:
+        cur.execute(query, params)
+        return keyset_page(cur.fetchall(), limit)
+
+
+def count_transactions(customer_id, invoice_number=None):
+    """
+    Row count behind fetch_transactions_page. Per invoice this is
+    the trigger-maintained invoice_balances.transaction_count; per
+    customer it is a COUNT(*) over the covering index, cached
+    until the next transaction insert.
+    """
+    if not invoice_number:
+        return _count_customer_transactions(customer_id)
+
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT transaction_count FROM invoice_balances
+            WHERE invoice_number = ?
+        """, (invoice_number,))
+        row = cur.fetchone()
+        return row[0] if row else 0
+
+
+@reference_data("transactions")
+def _count_customer_transactions(customer_id):
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*) FROM transactions WHERE customer_id = ?
+        """, (customer_id,))
+        return cur.fetchone()[0]
+
+
 def fetch_transactions_by_invoice(invoice_number):
     from dispute.db import get_cursor
     with get_cursor() as cur:
@@ -126,3 +446,38 @@ def fetch_transactions_by_invoice(invoice_number):
             WHERE linked_invoice_id = ?
         """, (invoice_number,))
         return cur.fetchall()
+
+
+def fetch_transactions_by_invoices(invoice_numbers):
+    """
+    Batched fetch_transactions_by_invoice: one query per
+    IN_CHUNK_SIZE invoices, grouped by invoice number in one pass.
+    Each invoice keeps its rows in insertion order.
+    """
+    invoice_numbers = list(dict.fromkeys(invoice_numbers))
+    grouped = {inv_no: [] for inv_no in invoice_numbers}
+
+    with get_cursor() as cur:
+        for start in range(0, len(invoice_numbers), IN_CHUNK_SIZE):
+            chunk = invoice_numbers[start:start + IN_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            cur.execute(f"""
+                SELECT
+                    linked_invoice_id,
+                    transaction_date,
+                    amount,
+                    tax_deducted,
+                    bank_charges,
+                    gateway_fee,
+                    forex_charges,
+                    currency,
+                    narration
+                FROM transactions
+                WHERE linked_invoice_id IN ({placeholders})
+                ORDER BY tid
+            """, chunk)
+
+            for row in cur.fetchall():
+                grouped[row[0]].append(row[1:])
+
+    return grouped
@@ -1,23 +1,29 @@
+import logging
+import os
 import streamlit as st
 import pandas as pd
 from datetime import timedelta
 
-from dispute.db import init_dispute_tables
+from core.sqlite_pool import count_queries
+from core.startup import ensure_started
+from dispute.db import DISPUTE_SCHEMA, PAGE_SIZE
 from dispute.customer_service import (
     add_customer,
     fetch_customers,
-    fetch_all_customers_full
+    fetch_customers_page,
+    count_customers
 )
 from dispute.invoice_service import (
     add_invoice,
     fetch_open_invoices,
-    fetch_invoices
+    fetch_invoices_page,
+    count_invoices
 )
 from dispute.transaction_service import (
     insert_transaction,
-    fetch_transactions
+    fetch_transactions_page,
+    count_transactions
 )
-from dispute.reasoning_agent import generate_dispute_explanation
 # from dispute.dispute_engine import analyze_dispute
 # from dispute.reasoning_agent import explain_dispute
 
@@ -29,6 +35,48 @@ def format_inr(value):
         return value
 
 
+# ============================================================
+# PAGINATED TABLES
+# ============================================================
+def render_paginated_table(key, fetch_page, total, columns, empty_message, scope=None):
+    """
+    Renders one keyset page at a time. fetch_page(after) returns
+    (rows, next_after). The cursors of the pages visited so far
+    live in session state under key, so Prev is one indexed query;
+    a new scope (e.g. another customer) starts again at page one.
+    """
+    pager = st.session_state.get(key)
+    if pager is None or pager["scope"] != scope:
+        pager = st.session_state[key] = {"scope": scope, "cursors": [None]}
+
+    cursors = pager["cursors"]
+    rows, next_after = fetch_page(cursors[-1])
+
+    if not rows and len(cursors) == 1:
+        st.info(empty_message)
+        return
+
+    st.dataframe(pd.DataFrame(rows, columns=columns), use_container_width=True)
+
+    first = (len(cursors) - 1) * PAGE_SIZE + 1
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+
+    prev_col.button(
+        "◀ Prev",
+        key=f"{key}_prev",
+        disabled=len(cursors) == 1,
+        on_click=cursors.pop
+    )
+    info_col.caption(f"Rows {first:,}–{first + len(rows) - 1:,} of {total:,}")
+    next_col.button(
+        "Next ▶",
+        key=f"{key}_next",
+        disabled=next_after is None,
+        on_click=cursors.append,
+        args=(next_after,)
+    )
+
+
 # ============================================================
 # CUSTOMER MANAGEMENT TAB
 # ============================================================
@@ -64,24 +112,22 @@ def render_customer_tab():
     st.divider()
     st.subheader("Customer Records")
 
-    customers = fetch_all_customers_full()
-    if customers:
-        df = pd.DataFrame(
-            customers,
-            columns=[
-                "Customer ID",
-                "Customer Name",
-                "Customer Type",
-                "Email",
-                "Phone Number",
-                "City",
-                "State",
-                "Country"
-            ]
-        )
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("No customers found.")
+    render_paginated_table(
+        "customers_pager",
+        fetch_customers_page,
+        count_customers(),
+        [
+            "Customer ID",
+            "Customer Name",
+            "Customer Type",
+            "Email",
+            "Phone Number",
+            "City",
+            "State",
+            "Country"
+        ],
+        "No customers found."
+    )
 
 
 # ============================================================
@@ -170,22 +216,21 @@ def render_invoice_tab():
     st.divider()
     st.subheader("Invoices")
 
-    invoices = fetch_invoices(customer_id)
-    if invoices:
-        df = pd.DataFrame(
-            invoices,
-            columns=[
-                "Invoice Number",
-                "Invoice Date",
-                "Due Date",
-                "Invoice Type",
-                "Invoice Amount",
-                "Payment Status"
-            ]
-        )
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("No invoices available.")
+    render_paginated_table(
+        "invoices_pager",
+        lambda after: fetch_invoices_page(customer_id, after),
+        count_invoices(customer_id),
+        [
+            "Invoice Number",
+            "Invoice Date",
+            "Due Date",
+            "Invoice Type",
+            "Invoice Amount",
+            "Payment Status"
+        ],
+        "No invoices available.",
+        scope=customer_id
+    )
 
 
 # ============================================================
@@ -295,22 +340,21 @@ def render_transaction_tab():
     st.divider()
     st.subheader("Transactions")
 
-    transactions = fetch_transactions(customer_id, invoice_number)
-    if transactions:
-        df = pd.DataFrame(
-            transactions,
-            columns=[
-                "Transaction Date",
-                "Amount",
-                "currency",
-                "Payment Mode",
-                "Bank Name",
-                "Linked Invoice"
-            ]
-        )
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("No transactions found.")
+    render_paginated_table(
+        "transactions_pager",
+        lambda after: fetch_transactions_page(customer_id, invoice_number, after),
+        count_transactions(customer_id, invoice_number),
+        [
+            "Transaction Date",
+            "Amount",
+            "currency",
+            "Payment Mode",
+            "Bank Name",
+            "Linked Invoice"
+        ],
+        "No transactions found.",
+        scope=(customer_id, invoice_number)
+    )
 
 
 # ============================================================
@@ -326,7 +370,12 @@ def render_dispute_tab():
         fetch_invoices_by_customer_and_date
     )
     from dispute.dispute_engine import analyze_invoices
-    from dispute.reasoning_agent import generate_dispute_explanation
+    from dispute.reasoning_agent import stream_dispute_explanation
+    from dispute.explanation_store import (
+        explanation_cache_key,
+        fetch_cached_explanation,
+        store_explanation
+    )
 
     st.subheader("Dispute & Reconciliation")
 
@@ -458,15 +507,31 @@ def render_dispute_tab():
     # -----------------------------
     st.subheader("Reconciliation Summary Explanation")
 
-    explanation_text = generate_dispute_explanation(
-        customer_name=customer_name,
-        analysis_rows=analysis
-    )
+    # Generated only on request; reruns reuse the stored text
+    cache_key = explanation_cache_key(customer_id, analysis)
+    explanation_text = fetch_cached_explanation(cache_key)
 
-    # --- FORCE INR SYMBOL IN EXPLANATION TEXT ---
-    explanation_text = explanation_text.replace("$", "₹")
+    if explanation_text is not None:
+        # --- FORCE INR SYMBOL IN EXPLANATION TEXT ---
+        st.write(explanation_text.replace("$", "₹"))
 
-    st.write(explanation_text)
+    elif st.button("Generate Explanation", key="disp_generate_explanation"):
+        fragments = []
+
+        def inr_tokens():
+            for fragment in stream_dispute_explanation(
+                customer_name=customer_name,
+                analysis_rows=analysis
+            ):
+                fragments.append(fragment)
+                # --- FORCE INR SYMBOL, TOKEN BY TOKEN ---
+                yield fragment.replace("$", "₹")
+
+        st.write_stream(inr_tokens())
+        store_explanation(cache_key, customer_id, "".join(fragments).strip())
+
+    else:
+        st.info("Click **Generate Explanation** to create the reconciliation narrative.")
 
     # -----------------------------
     # Footer
@@ -482,26 +547,38 @@ def render_dispute_tab():
 # ============================================================
 # MAIN ENTRY POINT
 # ============================================================
-def render_dispute_ui():
-    init_dispute_tables()
+# st.tabs runs every tab's body on every rerun; a radio picks
+# the one view to build, so a click in one view never re-runs
+# another view's queries, reconciliation or LLM call.
+VIEWS = {
+    "Customer Management": render_customer_tab,
+    "Invoice Management": render_invoice_tab,
+    "Transaction Management": render_transaction_tab,
+    "Dispute & Reconciliation": render_dispute_tab,
+}
 
-    st.title("⚖️ Dispute Analysis")
+# Set DISPUTE_UI_QUERY_STATS=1 to show SQL statements per rerun
+SHOW_QUERY_STATS = os.getenv("DISPUTE_UI_QUERY_STATS") == "1"
 
-    cust_tab, inv_tab, txn_tab, disp_tab = st.tabs([
-        "Customer Management",
-        "Invoice Management",
-        "Transaction Management",
-        "Dispute & Reconciliation"
-    ])
+logger = logging.getLogger(__name__)
 
-    with cust_tab:
-        render_customer_tab()
 
-    with inv_tab:
-        render_invoice_tab()
+def render_dispute_ui():
+    with count_queries() as counter:
+        ensure_started(DISPUTE_SCHEMA)
+
+        st.title("⚖️ Dispute Analysis")
+
+        view = st.radio(
+            "View",
+            list(VIEWS),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="dispute_view"
+        )
 
-    with txn_tab:
-        render_transaction_tab()
+        VIEWS[view]()
 
-    with disp_tab:
-        render_dispute_tab()
+    logger.debug("Dispute UI rerun (%s): %s queries", view, counter["queries"])
+    if SHOW_QUERY_STATS:
+        st.caption(f"{counter['queries']} SQL statements this rerun ({view})")
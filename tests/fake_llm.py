@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+
+
+class FakeRateLimitError(Exception):
+    """Looks like a provider 429 to the scheduler."""
+    status_code = 429
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """
+    Local stand-in for a chat model, for exercising the scheduler.
+
+    throttle_first: the first N calls raise FakeRateLimitError
+    latency:        seconds each call takes
+    fail_with:      exception raised by every call, if set
+    """
+
+    def __init__(self, name="fake", response="ok", latency=0.0,
+                 throttle_first=0, fail_with=None):
+        self.name = name
+        self.response = response
+        self.latency = latency
+        self.throttle_first = throttle_first
+        self.fail_with = fail_with
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+            call_no = self.calls
+        if self.fail_with is not None:
+            raise self.fail_with
+        if call_no <= self.throttle_first:
+            raise FakeRateLimitError(f"{self.name}: rate limited (call {call_no})")
+
+    def invoke(self, messages):
+        self._start_call()
+        time.sleep(self.latency)
+        return FakeResponse(self.response)
+
+    async def ainvoke(self, messages):
+        self._start_call()
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.cancelled += 1
+            raise
+        return FakeResponse(self.response)
+
+    def stream(self, messages):
+        self._start_call()
+        for word in self.response.split(" "):
+            time.sleep(self.latency)
+            yield FakeResponse(word + " ")
@@ -0,0 +1,57 @@
+import pytest
+
+from benchmarks.bench_columnar_engine import _fresh_db, _invoice_rows
+from core.sqlite_pool import close_thread_connections
+from dispute import db as dispute_db
+from dispute.columnar_engine import analyze_invoices_columnar, reconcile_columnar
+from dispute.dispute_engine import analyze_invoices
+
+CUSTOMERS = 6
+
+
+@pytest.fixture(params=range(4))
+def portfolio(request, tmp_path, monkeypatch):
+    """A fresh randomized dispute DB per seed; yields its rng."""
+    monkeypatch.setattr(dispute_db, "DB_PATH", dispute_db.DB_PATH)
+    rng = _fresh_db(str(tmp_path / "parity.db"), request.param,
+                    customers=CUSTOMERS, invoices=300, transactions=3000)
+    yield rng
+    close_thread_connections()
+
+
+def _selections(rng):
+    yield None, "0000-00-00", "9999-99-99"
+    for customer_id in range(1, CUSTOMERS + 1):
+        yield customer_id, "0000-00-00", "9999-99-99"
+        lo, hi = sorted(f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                        for _ in range(2))
+        yield customer_id, lo, hi
+
+
+def test_nested_matches_analyze_invoices(portfolio):
+    # repr(), so a 0 that turns into 0.0 fails as loudly as a wrong sum
+    for selection in _selections(portfolio):
+        expected = analyze_invoices(_invoice_rows(*selection))
+        assert repr(analyze_invoices_columnar(*selection)) == repr(expected), selection
+
+
+def test_flat_matches_analyze_invoices(portfolio):
+    for selection in _selections(portfolio):
+        expected = analyze_invoices(_invoice_rows(*selection))
+        for row in expected:
+            del row["transactions"]
+        flat = analyze_invoices_columnar(*selection, include_transactions=False)
+        assert repr(flat) == repr(expected), selection
+
+
+def test_reconcile_matches_analyze_invoices(portfolio):
+    for selection in _selections(portfolio):
+        expected = analyze_invoices(_invoice_rows(*selection))
+        frame = reconcile_columnar(*selection)
+        for column in ("invoice_number", "paid_amount", "outstanding_amount", "status"):
+            assert frame[column].tolist() == [row[column] for row in expected], column
+
+
+def test_portfolio_covers_every_status(portfolio):
+    statuses = {row["status"] for row in analyze_invoices(_invoice_rows())}
+    assert statuses == {"COMPLETED", "PARTIALLY_PAID", "PENDING"}
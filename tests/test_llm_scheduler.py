@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+import core.llm_scheduler as llm_scheduler
+from core.llm_scheduler import DeadlineExceeded, LLMScheduler
+from tests.fake_llm import FakeLLM, FakeRateLimitError
+
+UNLIMITED = (1000.0, 1000)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "BACKOFF_BASE", 0.0)
+
+
+def _scheduler(**llms):
+    return LLMScheduler(
+        llm_factory=llms.__getitem__,
+        rate_limits={name: UNLIMITED for name in llms}
+    )
+
+
+def test_ainvoke_retries_rate_limits():
+    llm = FakeLLM(throttle_first=2)
+
+    response = asyncio.run(_scheduler(groq=llm).ainvoke("groq", []))
+
+    assert response.content == "ok"
+    assert llm.calls == 3
+
+
+def test_ainvoke_gives_up_after_max_retries():
+    llm = FakeLLM(throttle_first=10)
+
+    with pytest.raises(FakeRateLimitError):
+        asyncio.run(_scheduler(groq=llm).ainvoke("groq", [], max_retries=2))
+
+    assert llm.calls == 3
+
+
+def test_ainvoke_does_not_retry_other_errors():
+    llm = FakeLLM(fail_with=ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(_scheduler(groq=llm).ainvoke("groq", []))
+
+    assert llm.calls == 1
+
+
+def test_ainvoke_deadline_cancels_the_call():
+    llm = FakeLLM(latency=5.0)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(_scheduler(groq=llm).ainvoke("groq", [], deadline=0.1))
+
+    assert llm.cancelled == 1
+
+
+def test_ainvoke_hedge_takes_the_first_success():
+    slow = FakeLLM(name="groq", response="slow", latency=5.0)
+    fast = FakeLLM(name="openai", response="fast")
+    scheduler = _scheduler(groq=slow, openai=fast)
+
+    response = asyncio.run(scheduler.ainvoke("groq", [], hedge=True, deadline=2.0))
+
+    assert response.content == "fast"
+    assert slow.cancelled == 1
+
+
+def test_stream_retries_before_the_first_chunk():
+    llm = FakeLLM(response="a b c", throttle_first=1)
+
+    text = "".join(c.content for c in _scheduler(groq=llm).stream("groq", []))
+
+    assert text == "a b c "
+    assert llm.calls == 2
+
+
+def test_stream_deadline_covers_the_first_chunk():
+    llm = FakeLLM(latency=5.0)
+
+    with pytest.raises(DeadlineExceeded):
+        next(_scheduler(groq=llm).stream("groq", [], deadline=0.1))